@@ -0,0 +1,676 @@
+import sys
+import time
+
+# Benchmarks - run with: python bench.py <name> [count]
+
+
+def report(label, count, seconds):
+    rate = count / seconds if seconds else float("inf")
+    print("{0}: {1} in {2:.3f}s ({3:,.0f}/sec)".format(label, count, seconds, rate))
+
+
+# The exercise files have hyphens in their names, so they are loaded by path
+def load_exercise(filename):
+    import importlib.util
+    import os
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+
+    return result, time.perf_counter() - start
+
+
+# Keys/sec: pycoin generic affine path vs the native secp256k1 engine
+def bench_keygen(count=2000):
+    from secp256k1 import multiply_generator, get_generator_table
+
+    secrets = [(i + 1) * 0x9E3779B97F4A7C15F39CC0605CEDC834 for i in range(count)]
+
+    _, seconds = timed(get_generator_table)
+    print("generator table build: {0:.3f}s".format(seconds))
+
+    native, seconds = timed(lambda: [multiply_generator(secret) for secret in secrets])
+    report("native keygen", count, seconds)
+
+    try:
+        from pycoin.ecdsa import generator_secp256k1 as g
+    except ImportError:
+        print("pycoin not installed, skipping pycoin keygen")
+        return
+
+    pycoin, seconds = timed(lambda: [(secret * g).pair() for secret in secrets])
+    report("pycoin keygen", count, seconds)
+
+    assert native == pycoin
+
+
+# Per-key inversion vs one shared inversion for the whole batch
+def bench_batch_keygen(count=20000):
+    from secp256k1 import multiply_generator, batch_multiply_generator, get_generator_table
+
+    secrets = [(i + 1) * 0x9E3779B97F4A7C15F39CC0605CEDC834 for i in range(count)]
+    get_generator_table()
+
+    single, seconds = timed(lambda: [multiply_generator(secret) for secret in secrets])
+    report("per-key inversion", count, seconds)
+
+    batch, seconds = timed(batch_multiply_generator, secrets)
+    report("batch inversion", count, seconds)
+
+    assert single == batch
+
+
+# Single process batch derivation vs the process pool
+def bench_pool_keygen(count=50000):
+    from secp256k1 import batch_multiply_generator, get_generator_table
+    from key_pool import derive_public_keys
+
+    get_generator_table()
+
+    _, seconds = timed(batch_multiply_generator, range(1, count + 1))
+    report("single process", count, seconds)
+
+    _, seconds = timed(lambda: sum(1 for _ in derive_public_keys(range(1, count + 1))))
+    report("process pool", count, seconds)
+
+
+# Compressed SEC keys decoded per second
+def bench_decompress(count=50000):
+    from secp256k1 import batch_multiply_generator, batch_decompress_points
+
+    points = batch_multiply_generator(range(1, count + 1))
+    compressed = [(x, y & 1) for x, y in points]
+
+    result, seconds = timed(batch_decompress_points, compressed)
+    report("batch decompress", count, seconds)
+
+    assert points == result
+
+
+# Hex string concatenation vs fixed-width SEC1 bytes
+def bench_sec_encode(count=50000):
+    from secp256k1 import batch_multiply_generator
+    from sec import encode_points, decode_points
+
+    points = batch_multiply_generator(range(1, count + 1))
+
+    def hex_strings():
+        return [hex(int("0x04" + format(x, 'x') + format(y, 'x'), 16)) for x, y in points]
+
+    _, seconds = timed(hex_strings)
+    report("hex string encode", count, seconds)
+
+    buffer, seconds = timed(encode_points, points, False)
+    report("SEC1 bulk encode", count, seconds)
+
+    decoded, seconds = timed(decode_points, buffer, False)
+    report("SEC1 bulk decode", count, seconds)
+
+    assert points == decoded
+
+
+# Per-point Python checks vs the vectorized validator
+def bench_validate(count=100000):
+    import random
+    import numpy as np
+    from curve_validation import validate_points, validate_python
+    from secp256k1 import P, batch_multiply_generator
+
+    rng = random.Random(1)
+    small_points = [(rng.randrange(223), rng.randrange(223)) for _ in range(count)]
+
+    expected, seconds = timed(validate_python, small_points, 223)
+    report("F223 python loop", count, seconds)
+    result, seconds = timed(validate_points, small_points, 223)
+    report("F223 numpy from list", count, seconds)
+    assert expected.tolist() == result.tolist()
+
+    small_array = np.array(small_points, dtype=np.int64)
+    result, seconds = timed(validate_points, small_array, 223)
+    report("F223 numpy from array", count, seconds)
+    assert expected.tolist() == result.tolist()
+
+    points = batch_multiply_generator(range(1, count // 10 + 1))
+
+    expected, seconds = timed(validate_python, points, P)
+    report("secp256k1 python loop", len(points), seconds)
+    result, seconds = timed(validate_points, points, P, 7, False, True)
+    report("secp256k1 limbs", len(points), seconds)
+    assert expected.tolist() == result.tolist()
+
+
+# get_point3 with exact modular inverses, from the exercise field F223 up to secp256k1
+def bench_point_add(count=20000):
+    from secp256k1 import P, G, multiply_generator
+
+    get_point3 = load_exercise("blockchain-101-b.py").get_point3
+
+    for label, prime_num, p1, p2 in [
+        ("F223", 223, (192, 105), (17, 56)),
+        ("secp256k1", P, G, multiply_generator(2)),
+    ]:
+        def add_many():
+            point = p1
+            for _ in range(count):
+                point = get_point3(point, p2, prime_num)
+            return point
+
+        _, seconds = timed(add_many)
+        report("get_point3 " + label, count, seconds)
+
+
+# Curve parameter checks: trial division vs the primality engine
+def bench_primality(count=1000):
+    from primality import is_prime
+
+    numbers = [2 ** 256 - 2 ** 32 - 977, 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141,
+               54673257461630679457, 18446744073709551557, 999999999989]
+
+    for n in numbers:
+        _, seconds = timed(lambda: [is_prime(n) for _ in range(count)])
+        report("is_prime {0}-bit".format(n.bit_length()), count, seconds)
+
+    def trial_division(n):
+        i = 3
+        while i * i <= n:
+            if n % i == 0:
+                return False
+            i += 2
+        return True
+
+    _, seconds = timed(trial_division, 999999999989)
+    report("trial division 40-bit", 1, seconds)
+
+
+# Segmented sieve over a window high up the number line
+def bench_sieve(width=10 ** 7):
+    from primality import primes_in_range, PrimeTable
+
+    lo = 10 ** 10
+    count, seconds = timed(lambda: sum(1 for _ in primes_in_range(lo, lo + width)))
+    report("primes in [10^10, 10^10 + {0})".format(width), count, seconds)
+
+    table, seconds = timed(PrimeTable, lo, lo + width)
+    report("PrimeTable over the same range ({0} bytes)".format(len(table.bits)), width, seconds)
+
+
+# Selection latency on a large wallet
+def bench_coin_selection(count=50000):
+    import random
+    from coin_selection import select_coins
+
+    rng = random.Random(1)
+    utxos = [rng.randint(1000, 10 ** 8) for _ in range(count)]
+    targets = [rng.randint(10 ** 6, 5 * 10 ** 8) for _ in range(20)]
+
+    for max_inputs in (2, 5, None):
+        results, seconds = timed(lambda: [select_coins(utxos, target, max_inputs, 0.5) for target in targets])
+        waste = sum(sum(result) - target for result, target in zip(results, targets) if sum(result) >= target)
+        report("select_coins max_inputs={0} (total waste {1})".format(max_inputs, waste), len(targets), seconds)
+
+
+# Re-sorting the wallet on every payment vs scanning a persistent index
+def bench_utxo_index(count=100000):
+    import random
+    from scholarship_question import sort_then_iterate
+    from utxo_index import SortedUTXOIndex
+
+    rng = random.Random(1)
+    utxos = [rng.randint(1000, 10 ** 8) for _ in range(count)]
+    targets = [rng.randint(10 ** 6, 10 ** 8) for _ in range(20)]
+
+    index, seconds = timed(SortedUTXOIndex, utxos)
+    report("index build", count, seconds)
+
+    expected, seconds = timed(lambda: [sort_then_iterate(utxos, target) for target in targets])
+    report("sort_then_iterate on list", len(targets), seconds)
+
+    result, seconds = timed(lambda: [index.find_pair(target) for target in targets])
+    report("find_pair on index", len(targets), seconds)
+    assert expected == result
+
+    spent = utxos[:1000]
+    received = [rng.randint(1000, 10 ** 8) for _ in range(1000)]
+
+    def churn():
+        for amount in spent:
+            index.remove(amount)
+        for amount in received:
+            index.add(amount)
+
+    _, seconds = timed(churn)
+    report("index remove + add", 2 * len(spent), seconds)
+
+
+# Python double loop vs tiled NumPy pairs vs sort_then_iterate, n from 1k to max_n
+def bench_pair_search(max_n=100000):
+    import random
+    import numpy as np
+    from pair_search import vectorized_brute_force_solution
+    from scholarship_question import brute_force_solution, sort_then_iterate
+
+    rng = random.Random(1)
+    n = 1000
+
+    while n <= max_n:
+        utxos = np.array([rng.randint(1000, 10 ** 8) for _ in range(n)], dtype=np.int64)
+        target = 10 ** 8 + 12345
+
+        if n <= 2000:
+            expected, seconds = timed(brute_force_solution, utxos.tolist(), target)
+            report("brute_force_solution n={0}".format(n), 1, seconds)
+
+        result, seconds = timed(vectorized_brute_force_solution, utxos, target)
+        report("vectorized_brute_force_solution n={0}".format(n), 1, seconds)
+
+        if n <= 2000:
+            assert expected == result
+
+        pair, seconds = timed(sort_then_iterate, utxos.tolist(), target)
+        report("sort_then_iterate n={0}".format(n), 1, seconds)
+        assert sum(pair) == sum(result)
+
+        n *= 10
+
+
+# Chained field multiplications: % on every step vs the FieldElement reductions
+def bench_field(count=200000):
+    from field import FieldElement, reduction_for, SECP256K1_P
+
+    for label, prime in [("secp256k1", SECP256K1_P), ("2^255 - 19", 2 ** 255 - 19), ("F223", 223)]:
+        start = 0x123456789ABCDEF % prime
+
+        def plain():
+            x = start
+            for _ in range(count):
+                x = x * x % prime
+            return x
+
+        def reduced():
+            reduction = reduction_for(prime)
+            multiply = reduction.multiply
+            x = reduction.to_form(start)
+            for _ in range(count):
+                x = multiply(x, x)
+            return reduction.from_form(x)
+
+        def elements():
+            x = FieldElement(start, prime)
+            for _ in range(count):
+                x = x * x
+            return int(x)
+
+        expected, seconds = timed(plain)
+        report("{0} x * x % p".format(label), count, seconds)
+
+        result, seconds = timed(reduced)
+        report("{0} {1}".format(label, type(reduction_for(prime)).__name__), count, seconds)
+        assert expected == result
+
+        result, seconds = timed(elements)
+        report("{0} FieldElement".format(label), count, seconds)
+        assert expected == result
+
+
+# y ** (p - 2) vs pow(y, p - 2, p) vs the extended Euclidean inverse vs one shared inversion
+def bench_division(count=10000):
+    import random
+    from field import modular_inverse, batch_division, SECP256K1_P
+
+    p = SECP256K1_P
+    rng = random.Random(1)
+    numerators = [rng.randrange(1, p) for _ in range(count)]
+    denominators = [rng.randrange(1, p) for _ in range(count)]
+
+    _, seconds = timed(lambda: 3 * (5 ** (223 - 2)) % 223)
+    report("y ** (p - 2) at p = 223 (256-bit p never finishes)", 1, seconds)
+
+    expected, seconds = timed(lambda: [x * pow(y, p - 2, p) % p for x, y in zip(numerators, denominators)])
+    report("pow(y, p - 2, p)", count, seconds)
+
+    result, seconds = timed(lambda: [x * modular_inverse(y, p) % p for x, y in zip(numerators, denominators)])
+    report("modular_inverse", count, seconds)
+    assert expected == result
+
+    result, seconds = timed(batch_division, numerators, denominators, p)
+    report("batch_division", count, seconds)
+    assert expected == result
+
+
+# Streaming and NumPy residue series
+def bench_series(finite_field=10 ** 7 + 19):
+    from collections import deque
+
+    a = load_exercise("blockchain-101-a.py")
+    count = finite_field - 1
+
+    _, seconds = timed(lambda: deque(a.iter_series_finite_field(finite_field, 12345), maxlen=0))
+    report("iter_series_finite_field", count, seconds)
+
+    _, seconds = timed(a.series_finite_field_array, finite_field, 12345)
+    report("series_finite_field_array", count, seconds)
+
+    _, seconds = timed(lambda: deque(a.iter_series_pow_finite_field(finite_field, 65537), maxlen=0))
+    report("iter_series_pow_finite_field", count, seconds)
+
+    _, seconds = timed(a.series_pow_finite_field_array, finite_field, 65537)
+    report("series_pow_finite_field_array", count, seconds)
+
+
+# Per-call cost of @instrumented while disabled and enabled, against the undecorated function
+def bench_instrumentation(count=20000):
+    import instrumentation
+    from primality import is_prime
+
+    wrapped = instrumentation.instrumented("is_prime", returns_steps=True)(is_prime)
+    numbers = [1000003] * count
+
+    _, seconds = timed(lambda: [is_prime(n) for n in numbers])
+    report("is_prime undecorated", count, seconds)
+
+    instrumentation.disable()
+    _, seconds = timed(lambda: [wrapped(n) for n in numbers])
+    report("is_prime instrumented, disabled", count, seconds)
+
+    with instrumentation.recording() as recorder:
+        _, seconds = timed(lambda: [wrapped(n) for n in numbers])
+    report("is_prime instrumented, enabled", count, seconds)
+
+    print(recorder.snapshot()["timings_ns"]["is_prime"])
+
+
+# Table startup cost: building in memory vs mapping the cached file, and keygen speed from each
+def bench_table_cache(count=5000):
+    import os
+    import tempfile
+    from curve import SECP256K1
+    from secp256k1 import build_generator_table, multiply_generator
+    from table_cache import write_generator_table, load_generator_table
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "table.bin")
+
+        built, seconds = timed(build_generator_table)
+        print("build table: {0:.4f}s".format(seconds))
+
+        _, seconds = timed(write_generator_table, path)
+        print("build and write table file: {0:.4f}s".format(seconds))
+
+        table, seconds = timed(load_generator_table, path)
+        print("map table file with checksum: {0:.4f}s".format(seconds))
+        table.close()
+
+        mapped, seconds = timed(load_generator_table, path, SECP256K1, False)
+        print("map table file without checksum: {0:.4f}s".format(seconds))
+
+        scalars = [(k * 0x9E3779B97F4A7C15) ** 4 for k in range(1, count + 1)]
+
+        SECP256K1.generator_table = built
+        _, seconds = timed(lambda: [multiply_generator(k) for k in scalars])
+        report("keygen from built table", count, seconds)
+
+        SECP256K1.generator_table = mapped
+        _, seconds = timed(lambda: [multiply_generator(k) for k in scalars])
+        report("keygen from mapped table", count, seconds)
+
+        SECP256K1.generator_table = built
+        mapped.close()
+
+
+# ECDSA signatures and verifications per second, joint Strauss-Shamir vs two separate multiplications
+def bench_ecdsa(count=2000):
+    import hashlib
+    from secp256k1 import N, get_generator_odd_multiples, get_generator_table, multiply_generator
+    from secp256k1 import multiply_generator_jacobian, scalar_multiply_jacobian, jacobian_add, to_affine
+    from ecdsa import sign, verify, bits_to_int
+
+    get_generator_table()
+    get_generator_odd_multiples()
+
+    private_keys = [(k * 0x9E3779B97F4A7C15) ** 4 % N for k in range(1, count + 1)]
+    public_keys = [multiply_generator(k) for k in private_keys]
+    hashes = [hashlib.sha256(str(k).encode()).digest() for k in range(count)]
+
+    signatures, seconds = timed(lambda: [sign(d, h) for d, h in zip(private_keys, hashes)])
+    report("sign", count, seconds)
+
+    results, seconds = timed(lambda: [verify(q, h, sig) for q, h, sig in zip(public_keys, hashes, signatures)])
+    report("verify (Strauss-Shamir)", count, seconds)
+    assert all(results)
+
+    def separate_verify(q, h, signature):
+        r, s = signature
+        w = pow(s, -1, N)
+        point = to_affine(jacobian_add(multiply_generator_jacobian(bits_to_int(h) * w % N),
+                                       scalar_multiply_jacobian(r * w % N, q)))
+
+        return point is not None and point[0] % N == r
+
+    results, seconds = timed(lambda: [separate_verify(q, h, sig) for q, h, sig in zip(public_keys, hashes, signatures)])
+    report("verify (u1 * G + u2 * Q separately)", count, seconds)
+    assert all(results)
+
+
+# Batch verification vs one verify per signature, for growing batch sizes
+def bench_batch_verify(count=512):
+    import hashlib
+    from secp256k1 import N, get_generator_odd_multiples, get_generator_table, batch_multiply_generator
+    from ecdsa import sign_recoverable, verify, batch_verify
+
+    get_generator_table()
+    get_generator_odd_multiples()
+
+    private_keys = [(k * 0x9E3779B97F4A7C15) ** 4 % N for k in range(1, count + 1)]
+    public_keys = batch_multiply_generator(private_keys)
+    hashes = [hashlib.sha256(str(k).encode()).digest() for k in range(count)]
+    items = [(h, sign_recoverable(d, h), q) for d, h, q in zip(private_keys, hashes, public_keys)]
+
+    size = 8
+    while size <= count:
+        batch = items[:size]
+
+        results, seconds = timed(lambda: [verify(q, h, sig) for h, sig, q in batch])
+        report("verify x {0}".format(size), size, seconds)
+        assert all(results)
+
+        results, seconds = timed(batch_verify, batch)
+        report("batch_verify {0}".format(size), size, seconds)
+        assert all(results)
+
+        size *= 4
+
+    bad = list(items[:64])
+    bad[17] = (hashlib.sha256(b"forged").digest(),) + bad[17][1:]
+    results, seconds = timed(batch_verify, bad)
+    report("batch_verify 64, one invalid", 64, seconds)
+    assert results.count(False) == 1
+
+
+# Multi-scalar multiplication from 2 to count points: separate multiplications, Bos-Coster and Pippenger
+def bench_msm(count=100000):
+    import random
+    from secp256k1 import N, G, INFINITY, jacobian_add_affine, batch_to_affine
+    from secp256k1 import scalar_multiply_jacobian, jacobian_add, to_affine
+    from msm import bos_coster_jacobian, pippenger_jacobian, best_window, pippenger_cost
+
+    rng = random.Random(23)
+
+    # G, 2G, 3G ... is one mixed addition per point, far cheaper than count scalar multiplications
+    chain = []
+    current = INFINITY
+    for _ in range(count):
+        current = jacobian_add_affine(current, G)
+        chain.append(current)
+    points = batch_to_affine(chain)
+    scalars = [rng.randrange(N) for _ in range(count)]
+
+    size = 2
+    while size <= count:
+        batch_scalars = scalars[:size]
+        batch_points = points[:size]
+        window_bits = best_window(size)
+        print("{0} points, window {1}, modelled cost {2} point operations".format(
+            size, window_bits, pippenger_cost(size, window_bits)))
+
+        if size <= 512:
+            def separate():
+                result = INFINITY
+                for k, point in zip(batch_scalars, batch_points):
+                    result = jacobian_add(result, scalar_multiply_jacobian(k, point))
+                return result
+
+            expected, seconds = timed(separate)
+            report("  separate scalar multiplications", size, seconds)
+        else:
+            expected = None
+
+        if size <= 20000:
+            result, seconds = timed(bos_coster_jacobian, batch_scalars, batch_points)
+            report("  Bos-Coster", size, seconds)
+            expected = expected or result
+            assert to_affine(expected) == to_affine(result)
+
+        result, seconds = timed(pippenger_jacobian, batch_scalars, batch_points)
+        report("  Pippenger", size, seconds)
+        if expected is not None:
+            assert to_affine(expected) == to_affine(result)
+
+        size = size * 4 if size * 4 <= count or size == count else count
+
+
+# Timing variance across Hamming-weight-skewed secrets, variable-time paths vs the constant-time path
+# Each group's per-call median should match the others for a constant-time path, the spread line shows
+# how far apart the group medians are. Calls from all groups are interleaved in random order so machine
+# noise and frequency drift hit every group alike.
+def bench_constant_time(count=300):
+    import random
+    import statistics
+    from secp256k1 import N, G, get_generator_table, multiply_generator, scalar_multiply
+    from secp256k1 import scalar_multiply_constant_time, get_generator_constant_time_table
+    from secp256k1 import multiply_generator_constant_time
+
+    get_generator_table()
+    get_generator_constant_time_table()
+    rng = random.Random(24)
+
+    def with_weight(weight):
+        return sum(1 << bit for bit in rng.sample(range(256), weight)) % N or 1
+
+    groups = {
+        "weight 8": [with_weight(8) for _ in range(count)],
+        "weight 128": [with_weight(128) for _ in range(count)],
+        "weight 248": [with_weight(248) for _ in range(count)],
+        "short (64 bit)": [rng.getrandbits(64) | 1 for _ in range(count)],
+    }
+    paths = [
+        ("fixed-base table (variable time)", lambda k: multiply_generator(k)),
+        ("wNAF (variable time)", lambda k: scalar_multiply(k, G)),
+        ("constant time, variable base", lambda k: scalar_multiply_constant_time(k, G)),
+        ("constant time, fixed base for G", lambda k: multiply_generator_constant_time(k)),
+    ]
+
+    calls = [(group, k) for group, scalars in groups.items() for k in scalars]
+
+    for name, path in paths:
+        print(name)
+        rng.shuffle(calls)
+        timings = {group: [] for group in groups}
+        medians = []
+
+        for group, k in calls:
+            start = time.perf_counter_ns()
+            path(k)
+            timings[group].append(time.perf_counter_ns() - start)
+
+        for group, samples in timings.items():
+            median = statistics.median(samples)
+            medians.append(median)
+            print("  {0}: median {1:.0f} us, stdev {2:.0f} us, {3:,.0f}/sec".format(
+                group, median / 1000, statistics.stdev(samples) / 1000, 1e9 / statistics.mean(samples)))
+
+        print("  spread between group medians: {0:.1%}".format(max(medians) / min(medians) - 1))
+
+
+def bench_glv(count=2000):
+    import hashlib
+    from secp256k1 import N, get_generator_odd_multiples, multiply_generator, scalar_multiply, double_multiply
+    from ecdsa import sign, verify
+
+    get_generator_odd_multiples()
+
+    points = [multiply_generator((k * 0x9E3779B97F4A7C15) ** 3 % N) for k in range(1, count + 1)]
+    scalars = [(k * 0xC2B2AE3D27D4EB4F) ** 5 % N for k in range(1, count + 1)]
+
+    plain, seconds = timed(lambda: [scalar_multiply(k, q, use_endomorphism=False) for k, q in zip(scalars, points)])
+    report("k * P (wNAF)", count, seconds)
+
+    results, seconds = timed(lambda: [scalar_multiply(k, q) for k, q in zip(scalars, points)])
+    report("k * P (GLV)", count, seconds)
+    assert plain == results
+
+    pairs = list(zip(scalars, reversed(scalars), points))
+
+    plain, seconds = timed(lambda: [double_multiply(u1, u2, q, use_endomorphism=False) for u1, u2, q in pairs])
+    report("u1 * G + u2 * Q (Strauss-Shamir)", count, seconds)
+
+    results, seconds = timed(lambda: [double_multiply(u1, u2, q) for u1, u2, q in pairs])
+    report("u1 * G + u2 * Q (Strauss-Shamir + GLV)", count, seconds)
+    assert plain == results
+
+    private_keys = [(k * 0x9E3779B97F4A7C15) ** 3 % N for k in range(1, count + 1)]
+    hashes = [hashlib.sha256(str(k).encode()).digest() for k in range(count)]
+    signatures = [sign(d, h) for d, h in zip(private_keys, hashes)]
+
+    results, seconds = timed(lambda: [verify(q, h, sig) for q, h, sig in zip(points, hashes, signatures)])
+    report("ECDSA verify (GLV)", count, seconds)
+    assert all(results)
+
+
+BENCHMARKS = {
+    "keygen": bench_keygen,
+    "batch-keygen": bench_batch_keygen,
+    "pool-keygen": bench_pool_keygen,
+    "decompress": bench_decompress,
+    "sec-encode": bench_sec_encode,
+    "validate": bench_validate,
+    "point-add": bench_point_add,
+    "primality": bench_primality,
+    "sieve": bench_sieve,
+    "coin-selection": bench_coin_selection,
+    "utxo-index": bench_utxo_index,
+    "pair-search": bench_pair_search,
+    "field": bench_field,
+    "division": bench_division,
+    "series": bench_series,
+    "instrumentation": bench_instrumentation,
+    "table-cache": bench_table_cache,
+    "ecdsa": bench_ecdsa,
+    "batch-verify": bench_batch_verify,
+    "msm": bench_msm,
+    "constant-time": bench_constant_time,
+    "glv": bench_glv,
+}
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in BENCHMARKS:
+        print("usage: python bench.py <{0}> [count]".format("|".join(sorted(BENCHMARKS))))
+        return 1
+
+    args = [int(arg) for arg in argv[2:]]
+    BENCHMARKS[argv[1]](*args)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
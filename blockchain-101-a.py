@@ -1,5 +1,7 @@
-import pytest
 import math
+from primality import is_prime
+from field import modular_inverse, batch_division
+from instrumentation import instrumented, record_steps
 
 
 # From Blockchain 101 - Foundational Math - https://eng.paxos.com/blockchain-101-foundational-math
@@ -15,6 +17,7 @@ import math
 # F19 = {0,1,2...18}
 
 # Finite Field Functions
+# Plain integers and one %, cheaper per call than building field.FieldElement objects (see python bench.py field)
 def finite_field_addition(x, y, finite_field):
     return (x + y) % finite_field
 
@@ -23,30 +26,104 @@ def finite_field_multiplication(x, y, finite_field):
     return (x * y) % finite_field
 
 
+# Series over the field: k*i mod p and i^k mod p for i = 1 ... p - 1
+# The iter_ functions stream the values one at a time, the _array functions compute them all at once with NumPy.
+def iter_series_finite_field(finite_field, constant_k, start=1, stop=None):
+    stop = finite_field if stop is None else stop
+    step = constant_k % finite_field
+    result = start * constant_k % finite_field
+
+    # k*(i+1) = k*i + k, so each value is one addition and at most one subtraction
+    for _ in range(start, stop):
+        yield result
+
+        result += step
+        if result >= finite_field:
+            result -= finite_field
+
+
+def iter_series_pow_finite_field(finite_field, constant_k, start=1, stop=None):
+    stop = finite_field if stop is None else stop
+
+    # pow(i, k, p) reduces after every step and uses a windowed method for large k
+    for number in range(start, stop):
+        yield pow(number, constant_k, finite_field)
+
+
+# NumPy bulk mode: int64 products, so the field has to stay below 2^31 (fields up to 10^8 fit easily)
+def series_finite_field_array(finite_field, constant_k, start=1, stop=None):
+    import numpy as np
+
+    check_array_field(finite_field)
+    stop = finite_field if stop is None else stop
+
+    return np.arange(start, stop, dtype=np.int64) * (constant_k % finite_field) % finite_field
+
+
+def series_pow_finite_field_array(finite_field, constant_k, start=1, stop=None):
+    import numpy as np
+
+    check_array_field(finite_field)
+    stop = finite_field if stop is None else stop
+
+    # exponent >>= 1 never reaches 0 for a negative exponent, inverses need the iter_ version (pow(i, -k, p))
+    if constant_k < 0:
+        raise ValueError("NumPy series need constant_k >= 0, use iter_series_pow_finite_field for inverses")
+
+    base = np.arange(start, stop, dtype=np.int64) % finite_field
+    result = np.ones_like(base)
+    exponent = constant_k
+
+    # Square and multiply over the whole array at once
+    while exponent:
+        if exponent & 1:
+            result = result * base % finite_field
+
+        base = base * base % finite_field
+        exponent >>= 1
+
+    return result % finite_field
+
+
+def check_array_field(finite_field):
+    if finite_field >= 2 ** 31:
+        raise ValueError("NumPy series need finite_field < 2^31, use the iter_ functions for larger fields")
+
+
+# Last value of the series for i = 1 ... p - 2
+@instrumented()
 def series_finite_field(finite_field, constant_k):
-    field_range = range(1, finite_field - 1)
     result = 0
 
-    for number in field_range:
-        result = (number * constant_k) % finite_field
-        print("series output: {0}".format(result))
+    for result in iter_series_finite_field(finite_field, constant_k, 1, finite_field - 1):
+        pass
+
+    record_steps('series_finite_field', max(finite_field - 2, 0))
 
     return result
 
 
+@instrumented()
 def series_pow_finite_field(finite_field, constant_k):
-    field_range = range(1, finite_field - 1)
     result = 0
 
-    for number in field_range:
-        result = (number ** constant_k) % finite_field
-        print("series output: {0}".format(result))
+    for result in iter_series_pow_finite_field(finite_field, constant_k, 1, finite_field - 1):
+        pass
+
+    record_steps('series_pow_finite_field', max(finite_field - 2, 0))
 
     return result
 
 
+# x / y = x * y^-1, the inverse comes from the extended Euclidean algorithm (field.modular_inverse)
+# rather than building y ** (p - 2) as a full integer before reducing it
 def finite_field_division(x, y, p):
-    return (x * (y ** (p - 2))) % p
+    return x * modular_inverse(y, p) % p
+
+
+# Divides many numerators by many denominators with a single inversion (field.batch_inverse)
+def batch_finite_field_division(numerators, denominators, p):
+    return batch_division(numerators, denominators, p)
 
 
 def fermats_little_theorem(n, p):
@@ -58,28 +135,24 @@ def fermats_little_theorem(n, p):
     return math.pow(n, p - 1) % p
 
 
+@instrumented()
 def is_number_prime(p):
-    # Time Complexity: O(sqrt(n)-2)
+    # Small-prime gcd, then deterministic Miller-Rabin / BPSW, see primality.is_prime
+    result, steps = is_prime(p)
+    record_steps('is_number_prime', steps)
 
-    sqr_root_p = math.ceil(math.sqrt(p))
-
-    for i in range(2, sqr_root_p):
-        modulo_result = p % i
-        if (modulo_result == 0):
-            print("value of p: {0}".format(p))
-            print("Divisible number found: {0}".format(i))
-            return False
-
-    return True
+    return result
 
 
 # Exercise for Finite Fields MULTIPLICATION from url: https://eng.paxos.com/blockchain-101-foundational-math
-# 3.
-series_finite_field(31, 3)  # All the results are shown as print, and all the results are members of the finite field
+# Run with: python blockchain-101-a.py
+def main():
+    # 3.
+    print(list(iter_series_finite_field(31, 3)))  # All the results are members of the finite field
 
-# 4.
-print("Starting power finite field")
-series_pow_finite_field(31, 30)  # All the results will be 1
+    # 4.
+    print("Starting power finite field")
+    print(list(iter_series_pow_finite_field(31, 30)))  # All the results will be 1
 
 
 # /**
@@ -176,6 +249,53 @@ class TestClass:
         expected = 1
         assert result == expected
 
+    def test_iter_series_finite_field(self):
+        expected = [(number * 3) % 31 for number in range(1, 31)]
+        result = list(iter_series_finite_field(31, 3))
+
+        assert expected == result
+
+    def test_iter_series_finite_field_range(self):
+        expected = [(number * 40) % 31 for number in range(5, 12)]
+        result = list(iter_series_finite_field(31, 40, 5, 12))
+
+        assert expected == result
+
+    def test_iter_series_pow_finite_field(self):
+        expected = [1] * 30
+        result = list(iter_series_pow_finite_field(31, 30))
+
+        assert expected == result
+
+    def test_series_finite_field_array(self):
+        expected = list(iter_series_finite_field(10007, 1234))
+        result = series_finite_field_array(10007, 1234).tolist()
+
+        assert expected == result
+
+    def test_series_pow_finite_field_array(self):
+        expected = list(iter_series_pow_finite_field(10007, 4321))
+        result = series_pow_finite_field_array(10007, 4321).tolist()
+
+        assert expected == result
+        assert [1] * 30 == series_pow_finite_field_array(31, 30).tolist()
+
+    def test_series_pow_array_negative_exponent(self):
+        try:
+            series_pow_finite_field_array(7, -1)
+            assert False
+        except ValueError:
+            pass
+
+        assert [1, 4, 5, 2, 3, 6] == list(iter_series_pow_finite_field(7, -1))
+
+    def test_series_array_field_too_large(self):
+        try:
+            series_finite_field_array(2 ** 61 - 1, 3)
+            assert False
+        except ValueError:
+            pass
+
     # Division function test for finite fields
     def test_finite_field_division(self):
         result = finite_field_division(2, 3, 19)
@@ -187,6 +307,19 @@ class TestClass:
         expected = 4
         assert result == expected
 
+    def test_finite_field_division_256_bit_prime(self):
+        p = 2 ** 256 - 2 ** 32 - 977
+        expected = 2 * pow(3, p - 2, p) % p
+        result = finite_field_division(2, 3, p)
+
+        assert expected == result
+
+    def test_batch_finite_field_division(self):
+        expected = [7, 4]
+        result = batch_finite_field_division([2, 3], [3, 15], 19)
+
+        assert expected == result
+
     # Testing Fermats Little Theorem
     def test_fermats_little_theorem(self):
         # Tests that result of a^prime_num - a
@@ -237,12 +370,36 @@ class TestClass:
 
         assert result == expected
 
+    def test_is_number_prime_4(self):
+        # Trial division up to ceil(sqrt(p)) used to miss perfect squares like 9 and 25
+        expected = [False, False, False, False]
+        result = [is_number_prime(p) for p in [1, 4, 9, 25]]
+
+        assert result == expected
+
+    def test_is_number_prime_6(self):
+        expected = True
+        result = is_number_prime(2 ** 256 - 2 ** 32 - 977)
+
+        assert result == expected
+
     def test_is_number_prime_5(self):
         expected = False
         result = is_number_prime(150)
 
         assert result == expected
 
+    def test_is_number_prime_records_steps(self):
+        from instrumentation import recording
+        expected = 13
+
+        with recording() as recorder:
+            is_number_prime(18446744073709551557)
+        result = recorder.steps['is_number_prime'].total
+
+        assert expected == result
+        assert 1 == recorder.counters['is_number_prime.calls']
+
     # Exercise for Finite Fields MULTIPLICATION from url: https://eng.paxos.com/blockchain-101-foundational-math
     def test_exercise_multiplication_finite_field_1(self):
         expected = 22
@@ -309,3 +466,7 @@ class TestClass:
 
         result = verify_point_in_elliptic_curve(x3, y3)
         assert expected == result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,27 @@
-import pytest
 import math
 from fractions import Fraction
+from curve import TEST_CURVE_F223
 
 
 # From Blockchain 101 - Elliptic Curve Cryptography - https://eng.paxos.com/blockchain-101-elliptic-curve-cryptography
 
 
 # How to calculate Elliptic Curves over Finite Fields
+# The exercises use y^2 = x^3 + 7, curve.TEST_CURVE_F223. Any curve.Curve can be passed to use its a and b instead.
 # Exercise 1
 def calc_y(y, prime_num):
-    return (y ** 2) % prime_num
+    return (y * y) % prime_num
 
 
-def calc_x(x, prime_num):
-    return (x ** 3 + 7) % prime_num
+def calc_x(x, prime_num, curve=TEST_CURVE_F223):
+    return (x * x * x + curve.a * x + curve.b) % prime_num
 
 
-def is_point_in_curve(point, prime_num):
+def is_point_in_curve(point, prime_num, curve=TEST_CURVE_F223):
     x = point[0]
     y = point[1]
 
-    xVal = calc_x(x, prime_num)
+    xVal = calc_x(x, prime_num, curve)
     yVal = calc_y(y, prime_num)
 
     if xVal == yVal:
@@ -29,16 +30,12 @@ def is_point_in_curve(point, prime_num):
     return False
 
 
-def lazy_check_of_points(points, prime_num):
+def lazy_check_of_points(points, prime_num, curve=TEST_CURVE_F223):
     # F223 is the finite field
     # y2 = x3 + 7
-    results = []
-
-    for eachPoint in points:
-        x = eachPoint[0]
-        y = eachPoint[1]
-
-        results.append(is_point_in_curve((x, y), prime_num))
+    # All points are checked at once, see curve_validation.validate_points (imported here so NumPy loads lazily)
+    from curve_validation import validate_points
+    results = validate_points(points, prime_num, b=curve.b, a=curve.a).tolist()
 
     return results
 
@@ -66,8 +63,23 @@ def lazy_check_of_points(points, prime_num):
 #6. Return P3
     # a. return x3, y3
 
-def get_point3(p1, p2, prime_num):
-    slope = calculate_slope_intercept(p1, p2, prime_num)
+# The slope is an exact field element: (y2 - y1) * (x2 - x1)^-1 mod p, no float division.
+# None is the point at infinity: P + None = P, and P + (-P) = None.
+def get_point3(p1, p2, prime_num, curve=TEST_CURVE_F223):
+    if p1 is None:
+        return p2
+
+    if p2 is None:
+        return p1
+
+    if p1[0] % prime_num == p2[0] % prime_num:
+        if (p1[1] + p2[1]) % prime_num == 0:
+            return None
+
+        slope = calculate_tangent_slope(p1, prime_num, curve)
+    else:
+        slope = calculate_slope_intercept(p1, p2, prime_num)
+
     x3 = get_x3(slope, p1, p2, prime_num)
     y3 = get_y3(slope, p1, x3, prime_num)
 
@@ -82,14 +94,19 @@ def calculate_slope_intercept(p1, p2, prime_num):
     x2 = p2[0]
     y2 = p2[1]
 
-    slope_intercept = (y2 - y1) / (x2 - x1)
-    fraction = get_as_fraction(slope_intercept)
+    slope_x_val = get_inverse(x2 - x1, prime_num)
+    slope = get_slope(y2 - y1, slope_x_val, prime_num)
+
+    return slope
 
-    numerator = get_numerator(fraction)
-    denominator = get_denominator(fraction)
 
-    slope_x_val = get_slope_x_val(denominator, (prime_num - 2), prime_num)
-    slope = get_slope(numerator, slope_x_val, prime_num)
+def calculate_tangent_slope(p1, prime_num, curve=TEST_CURVE_F223):
+    # Doubling: s = (3 * x1^2 + a) / (2 * y1)
+    x1 = p1[0]
+    y1 = p1[1]
+
+    slope_x_val = get_inverse(2 * y1, prime_num)
+    slope = get_slope(3 * x1 * x1 + curve.a, slope_x_val, prime_num)
 
     return slope
 
@@ -110,6 +127,12 @@ def get_slope_x_val(x_denominator, prime_num_minus_2, prime_num):
     return pow(x_denominator, prime_num_minus_2, prime_num)
 
 
+# Same value as get_slope_x_val(x, prime_num - 2, prime_num), but pow(x, -1, p)
+# runs the extended Euclidean algorithm instead of a 256-bit exponentiation
+def get_inverse(x, prime_num):
+    return pow(x, -1, prime_num)
+
+
 def get_slope(numerator, slope_x_val, prime_num):
     return (numerator * slope_x_val) % prime_num
 
@@ -117,7 +140,7 @@ def get_slope(numerator, slope_x_val, prime_num):
 def get_x3(slope, p1, p2, prime_num):
     x1 = p1[0]
     x2 = p2[0]
-    return ((slope ** 2) - x1 - x2) % prime_num
+    return (slope * slope - x1 - x2) % prime_num
 
 
 def get_y3(slope, p1, x3, prime_num):
@@ -191,6 +214,12 @@ class TestClass:
 
         assert expected == result
 
+    def test_get_inverse(self):
+        expected = get_slope_x_val(175, (223 - 2), 223)
+        result = get_inverse(175, 223)
+
+        assert expected == result
+
     def test_get_slope(self):
         expected = 143
         numerator = 49
@@ -257,6 +286,54 @@ class TestClass:
 
         assert expected == result
 
+    def test_get_point3_doubling(self):
+        expected = 49, 71
+        p1 = (192, 105)
+        prime_num = 223
+        result = get_point3(p1, p1, prime_num)
+
+        assert expected == result
+
+    def test_get_point3_doubling_with_a_coefficient(self):
+        # y^2 = x^3 + 2x + 2 over F17, 2 * (5, 1) = (6, 3)
+        from curve import TEST_CURVE_F17
+        expected = 6, 3
+        p1 = (5, 1)
+        result = get_point3(p1, p1, 17, TEST_CURVE_F17)
+
+        assert expected == result
+        assert is_point_in_curve(result, 17, TEST_CURVE_F17)
+
+    def test_get_point3_inverse_is_infinity(self):
+        expected = None
+        p1 = (192, 105)
+        p2 = (192, 223 - 105)
+        prime_num = 223
+        result = get_point3(p1, p2, prime_num)
+
+        assert expected == result
+
+    def test_get_point3_with_infinity(self):
+        expected = 192, 105
+        p1 = (192, 105)
+        prime_num = 223
+        result = get_point3(p1, None, prime_num)
+
+        assert expected == result
+        assert expected == get_point3(None, p1, prime_num)
+
+    def test_get_point3_256_bit_prime(self):
+        # G + 2G = 3G on secp256k1
+        prime_num = 2 ** 256 - 2 ** 32 - 977
+        g = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+             0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+        expected = (0xF9308A019258C31049344F85F89D5229B531C845836F99B08601F113BCE036F9,
+                    0x388F7B0F632DE8140FE337E62A37F3566500A99934C2231B6CB9FD7584B8E672)
+        g2 = get_point3(g, g, prime_num)
+        result = get_point3(g, g2, prime_num)
+
+        assert expected == result
+
     def test_3(self):
         expected = 47, 71
         p1 = (143, 98)
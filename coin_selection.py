@@ -0,0 +1,279 @@
+import random
+import time
+
+from scholarship_question import sort_then_iterate
+from utxo_index import SortedUTXOIndex
+
+# Coin selection: pick the set of unspent outputs whose sum covers the target with the least waste
+# waste = sum(selected) - target, ties go to the set with fewer inputs
+
+# 1. Branch and bound over the amounts sorted largest first. A branch is cut when it can no longer reach
+#    the target, when it is already worse than the best set found, or when it hits max_inputs.
+#    After an exact match only sets with fewer inputs can still win, so branches are capped below its size.
+#    The search stops once an exact match uses as few inputs as any set could (the count of largest amounts
+#    needed to reach the target), after max_tries steps, or when the time budget runs out.
+# 2. If branch and bound finds nothing, fall back to a knapsack approximation (random subsets, like Bitcoin Core's).
+
+# Results are tuples of amounts in ascending order, () when the target can't be reached.
+# With max_inputs=2 the result is the same pair tuple sort_then_iterate returns, (0, 0) when there is no pair.
+# input_TXs can be a list of amounts, an int64 satoshi buffer (see scholarship_question.satoshi_view)
+# or a SortedUTXOIndex, which skips the sort. With satoshi amounts every sum and comparison is an exact integer.
+
+DEFAULT_MAX_TRIES = 100000
+TIME_CHECK_INTERVAL = 1024
+KNAPSACK_ITERATIONS = 1000
+
+
+def select_coins(input_TXs, target, max_inputs=None, time_budget=None, max_tries=DEFAULT_MAX_TRIES):
+    if max_inputs == 2:
+        if len(input_TXs) < 2:
+            return 0, 0
+
+        return sort_then_iterate(input_TXs, target)
+
+    if isinstance(input_TXs, SortedUTXOIndex):
+        values = list(reversed(input_TXs))
+    else:
+        values = sorted(input_TXs, reverse=True)
+    max_inputs = len(values) if max_inputs is None else max_inputs
+    if max_inputs < 1:
+        return ()
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+    selection = branch_and_bound(values, target, max_inputs, deadline, max_tries)
+
+    if selection is None:
+        selection = knapsack_selection(values, target, max_inputs, deadline)
+
+    if selection is None:
+        return ()
+
+    return tuple(sorted(selection))
+
+
+# values must be sorted largest first
+def branch_and_bound(values, target, max_inputs, deadline=None, max_tries=DEFAULT_MAX_TRIES):
+    n = len(values)
+
+    remaining = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + values[i]
+
+    # No set reaching the target has fewer inputs than the largest amounts that reach it
+    fewest_inputs = 0
+    while fewest_inputs < n and remaining[0] - remaining[fewest_inputs] < target:
+        fewest_inputs += 1
+
+    best_sum = None
+    best_selection = None
+    selected = []
+    current_sum = 0
+    i = 0
+
+    for tries in range(max_tries):
+        if deadline is not None and tries % TIME_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+            break
+
+        if best_sum is not None and (current_sum > best_sum or
+                                     (current_sum == best_sum and len(selected) >= len(best_selection))):
+            backtrack = True
+        elif current_sum >= target:
+            best_sum = current_sum
+            best_selection = [values[j] for j in selected]
+            if current_sum == target:
+                if len(selected) <= fewest_inputs:
+                    break
+
+                # Only an exact match with fewer inputs can beat this one
+                max_inputs = min(max_inputs, len(selected) - 1)
+
+            backtrack = True
+        elif current_sum + remaining[i] < target or len(selected) >= max_inputs:
+            backtrack = True
+        else:
+            backtrack = False
+
+        if not backtrack:
+            selected.append(i)
+            current_sum += values[i]
+            i += 1
+            continue
+
+        if not selected:
+            break
+
+        # Switch the last included amount to excluded, skipping equal amounts that would repeat the same sums
+        j = selected.pop()
+        current_sum -= values[j]
+        i = j + 1
+        while i < n and values[i] == values[j]:
+            i += 1
+
+    return best_selection
+
+
+# Knapsack approximation: a single amount that covers the target on its own,
+# or random subsets of the smaller amounts, keeping the cheapest one that reaches the target
+def knapsack_selection(values, target, max_inputs, deadline=None, iterations=KNAPSACK_ITERATIONS, seed=0):
+    larger = [value for value in values if value >= target]
+    smaller = [value for value in values if value < target]
+
+    best_selection = [larger[-1]] if larger else None
+    best_sum = larger[-1] if larger else None
+
+    if sum(smaller) < target:
+        return best_selection
+
+    rng = random.Random(seed)
+    n = len(smaller)
+
+    for _ in range(iterations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+        included = [False] * n
+        total = 0
+        count = 0
+        reached = False
+
+        # First pass includes each amount at random, the second pass fills in the rest
+        for pass_number in range(2):
+            if reached:
+                break
+
+            for i in range(n):
+                if included[i] or count == max_inputs:
+                    continue
+
+                if pass_number == 0 and rng.random() < 0.5:
+                    continue
+
+                total += smaller[i]
+                count += 1
+                included[i] = True
+
+                if total >= target:
+                    reached = True
+                    if best_sum is None or total < best_sum:
+                        best_sum = total
+                        best_selection = [smaller[k] for k in range(n) if included[k]]
+
+                    # Take the last one back out and keep looking for a closer sum
+                    total -= smaller[i]
+                    count -= 1
+                    included[i] = False
+
+        if best_sum == target:
+            break
+
+    return best_selection
+
+
+class TestClass:
+    def test_select_two_inputs_matches_sort_then_iterate(self):
+        expected = 0.5, 0.9
+        input_TXs = [2, 0.5, 5, 3, 0.9]
+        target = 0.71
+        result = select_coins(input_TXs, target, max_inputs=2)
+
+        assert expected == result
+        assert input_TXs == [2, 0.5, 5, 3, 0.9]
+
+    def test_select_from_index(self):
+        expected = 1, 2, 4
+        index = SortedUTXOIndex([1, 2, 4, 8, 16])
+        result = select_coins(index, 7)
+
+        assert expected == result
+        assert (0.5, 0.9) == select_coins(SortedUTXOIndex([2, 0.5, 5, 3, 0.9]), 0.71, max_inputs=2)
+
+    def test_select_satoshis(self):
+        from scholarship_question import satoshi_array, satoshi_view, to_satoshis
+        expected = 10000000, 20000000
+        input_TXs = satoshi_view(satoshi_array([0.1, 0.2, 0.5, 0.25]))
+        result = select_coins(input_TXs, to_satoshis(0.3))
+
+        assert expected == result
+
+    def test_select_two_inputs_no_pair(self):
+        expected = 0, 0
+        input_TXs = [0.1, 0.2, 0.3, 0.35]
+        target = 0.71
+        result = select_coins(input_TXs, target, max_inputs=2)
+
+        assert expected == result
+
+    def test_select_exact_match_with_three_inputs(self):
+        expected = 1, 2, 4
+        input_TXs = [1, 2, 4, 8, 16]
+        target = 7
+        result = select_coins(input_TXs, target)
+
+        assert expected == result
+
+    def test_select_least_waste(self):
+        expected = 5, 6
+        input_TXs = [12, 5, 6, 9]
+        target = 10
+        result = select_coins(input_TXs, target)
+
+        assert expected == result
+
+    def test_select_prefers_fewer_inputs_on_tie(self):
+        expected = (10,)
+        input_TXs = [3, 3, 4, 10]
+        target = 10
+        result = select_coins(input_TXs, target)
+
+        assert expected == result
+
+    def test_exact_match_prefers_fewer_inputs(self):
+        expected = 43, 48
+        input_TXs = [8, 1, 15, 51, 31, 56, 36, 48, 11, 34, 43]
+        result = select_coins(input_TXs, 91, max_inputs=3)
+
+        assert expected == result
+
+    def test_select_respects_max_inputs(self):
+        expected = 4, 8
+        input_TXs = [1, 2, 4, 8, 16]
+        target = 11
+        result = select_coins(input_TXs, target, max_inputs=2)
+
+        assert expected == result
+        assert (1, 2, 8) == select_coins(input_TXs, target, max_inputs=3)
+        assert () == select_coins(input_TXs, target, max_inputs=0)
+
+    def test_select_unreachable(self):
+        expected = ()
+        input_TXs = [1, 2, 3]
+        target = 7
+        result = select_coins(input_TXs, target)
+
+        assert expected == result
+
+    def test_branch_and_bound_matches_exhaustive_search(self):
+        from itertools import combinations
+        rng = random.Random(3)
+
+        for _ in range(200):
+            input_TXs = [rng.randint(1, 100) for _ in range(10)]
+            target = rng.randint(50, 300)
+            max_inputs = rng.choice([None, 3, 4])
+            best = min(((sum(c) - target, r) for r in range(1, (max_inputs or 10) + 1)
+                        for c in combinations(input_TXs, r) if sum(c) >= target), default=None)
+            result = select_coins(input_TXs, target, max_inputs)
+
+            assert best == ((sum(result) - target, len(result)) if result else None)
+
+    def test_knapsack_fallback(self):
+        values = sorted([5, 7, 11, 13, 17, 19], reverse=True)
+        result = knapsack_selection(values, 30, max_inputs=6)
+
+        assert sum(result) >= 30
+
+    def test_falls_back_to_knapsack_when_out_of_tries(self):
+        result = select_coins([5, 7, 11, 13, 17, 19], 30, max_tries=1)
+
+        assert sum(result) >= 30
@@ -0,0 +1,103 @@
+# Short Weierstrass curves: y^2 = x^3 + ax + b over F(p)
+# A Curve holds the domain parameters and the constants the point engine (secp256k1.py) precomputes from them,
+# so secp256k1 and the small test curves run through the same code.
+
+# Fixed-base tables use 8 bit windows, enough windows to cover a scalar mod n
+GENERATOR_WINDOW_BITS = 8
+
+
+class Curve:
+    def __init__(self, name, p, a, b, n, g, h=1, beta=None, lam=None, glv_basis=None):
+        self.name = name
+        self.p = p
+        self.a = a % p
+        self.b = b % p
+        self.n = n
+        self.g = g
+        self.h = h
+
+        # GLV endomorphism, for a = 0 curves with p = 1 (mod 3): phi(x, y) = (beta * x, y) = lam * (x, y),
+        # beta a cube root of unity mod p and lam one mod n. glv_basis holds two short vectors (a1, b1), (a2, b2)
+        # of the lattice {(x, y): x + y * lam = 0 mod n} used to split scalars (see secp256k1.glv_split).
+        self.beta = beta
+        self.lam = lam
+        self.glv_basis = glv_basis
+
+        # p = 3 (mod 4): a square root of a is a^((p + 1) / 4), otherwise Tonelli-Shanks is used
+        self.sqrt_exponent = (p + 1) // 4 if p % 4 == 3 else None
+        # Bytes per coordinate in fixed width encodings (sec.py, table_cache.py)
+        self.coordinate_size = (p.bit_length() + 7) // 8
+
+        self.generator_windows = -(-n.bit_length() // GENERATOR_WINDOW_BITS)
+        # Built on first use by secp256k1.get_generator_table, secp256k1.get_generator_odd_multiples
+        # and secp256k1.get_generator_constant_time_table
+        self.generator_table = None
+        self.generator_odd_multiples = None
+        self.generator_constant_time_table = None
+
+    def __repr__(self):
+        return "Curve({0})".format(self.name)
+
+    # Right hand side of the equation, x^3 + ax + b mod p
+    def equation(self, x):
+        return (x * x * x + self.a * x + self.b) % self.p
+
+    def contains(self, point):
+        if point is None:
+            return True
+
+        x, y = point
+
+        return 0 <= x < self.p and 0 <= y < self.p and y * y % self.p == self.equation(x)
+
+
+SECP256K1 = Curve(
+    'secp256k1',
+    p=2 ** 256 - 2 ** 32 - 977,
+    a=0,
+    b=7,
+    n=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141,
+    g=(0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+       0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8),
+    beta=0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE,
+    lam=0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72,
+    glv_basis=((0x3086D221A7D46BCDE86C90E49284EB15, -0xE4437ED6010E88286F547FA90ABFE4C3),
+               (0x114CA50F7A8E2F3F657C1108D9D44CFD8, 0x3086D221A7D46BCDE86C90E49284EB15)),
+)
+
+# Small curves for tests, small enough to check every point by hand
+# y^2 = x^3 + 7 over F223, the curve from blockchain-101-b.py. (15, 86) generates a subgroup of order 7.
+TEST_CURVE_F223 = Curve('F223', p=223, a=0, b=7, n=7, g=(15, 86), h=36)
+# y^2 = x^3 + 7 over F211, the whole group has prime order 199
+TEST_CURVE_F211 = Curve('F211', p=211, a=0, b=7, n=199, g=(3, 33))
+# y^2 = x^3 + 2x + 2 over F17: a != 0 and p = 1 (mod 4), group order 19
+TEST_CURVE_F17 = Curve('F17', p=17, a=2, b=2, n=19, g=(5, 1))
+
+
+class TestClass:
+    def test_generators_are_on_their_curves(self):
+        for curve in [SECP256K1, TEST_CURVE_F223, TEST_CURVE_F211, TEST_CURVE_F17]:
+            assert curve.contains(curve.g)
+
+    def test_contains(self):
+        assert TEST_CURVE_F223.contains((192, 105))
+        assert not TEST_CURVE_F223.contains((200, 119))
+        assert TEST_CURVE_F223.contains(None)
+
+    def test_glv_constants(self):
+        p = SECP256K1.p
+        n = SECP256K1.n
+
+        assert pow(SECP256K1.beta, 3, p) == 1 and SECP256K1.beta != 1
+        assert pow(SECP256K1.lam, 3, n) == 1 and SECP256K1.lam != 1
+
+        for a, b in SECP256K1.glv_basis:
+            assert (a + b * SECP256K1.lam) % n == 0
+
+    def test_precomputed_constants(self):
+        assert SECP256K1.sqrt_exponent == (SECP256K1.p + 1) // 4
+        assert TEST_CURVE_F17.sqrt_exponent is None
+        assert 32 == SECP256K1.generator_windows
+        assert 32 == SECP256K1.coordinate_size
+        assert 1 == TEST_CURVE_F223.coordinate_size
+        assert 1 == TEST_CURVE_F211.generator_windows
@@ -0,0 +1,204 @@
+import numpy as np
+
+# Vectorized on-curve validation: y^2 = x^3 + ax + b (mod p), a = 0 unless given (see curve.Curve)
+# Small fields (p < 2^31, e.g. F137 and F223 from the exercises) are checked directly in int64 arrays.
+# 256-bit pseudo-Mersenne fields (p = 2^256 - c with small c, e.g. secp256k1) are checked with
+# 16 x 16-bit limbs per value, so every limb product and column sum fits in a uint64. The limb path is a = 0 only.
+# Limb arrays are limb-major, shape (limbs, n), so each limb is one contiguous row.
+# validate_points picks the limb path only when asked: CPython's own 256-bit integer arithmetic is
+# faster than 16 rows of uint64 limb products, so 256-bit fields default to the Python loop
+# (see python bench.py validate).
+
+SMALL_PRIME_LIMIT = 2 ** 31
+
+LIMB_BITS = 16
+LIMB_MASK = (1 << LIMB_BITS) - 1
+LIMBS = 16
+LIMB_FIELD_BITS = LIMB_BITS * LIMBS
+LIMB_MAX_C = 2 ** 64
+
+
+def validate_points(points, p, b=7, return_indices=False, use_limbs=False, a=0):
+    if p < SMALL_PRIME_LIMIT:
+        mask = validate_small_field(points, p, b, a)
+    elif use_limbs and a == 0 and is_pseudo_mersenne(p):
+        mask = validate_limbs(points, p, b)
+    else:
+        mask = validate_python(points, p, b, a)
+
+    if return_indices:
+        return mask, np.flatnonzero(~mask)
+
+    return mask
+
+
+def validate_small_field(points, p, b=7, a=0):
+    values = np.asarray(points, dtype=np.int64).reshape(-1, 2) % p
+    x = values[:, 0]
+    y = values[:, 1]
+
+    return y * y % p == (x * x % p * x + a % p * x % p + b) % p
+
+
+def validate_python(points, p, b=7, a=0):
+    return np.fromiter(((y * y - x * x * x - a * x - b) % p == 0 for x, y in points), dtype=bool, count=len(points))
+
+
+# Limb arithmetic for p = 2^256 - c
+def is_pseudo_mersenne(p):
+    c = 2 ** LIMB_FIELD_BITS - p
+
+    return 0 < c < LIMB_MAX_C
+
+
+def int_to_limbs(value, width):
+    return [(value >> (LIMB_BITS * i)) & LIMB_MASK for i in range(width)]
+
+
+def to_limbs(values, p):
+    data = b''.join((value % p).to_bytes(LIMB_FIELD_BITS // 8, 'little') for value in values)
+
+    return np.frombuffer(data, dtype='<u2').reshape(-1, LIMBS).T.astype(np.uint64)
+
+
+def propagate_carries(t):
+    for i in range(t.shape[0] - 1):
+        t[i + 1] += t[i] >> LIMB_BITS
+        t[i] &= LIMB_MASK
+
+    return t
+
+
+def multiply_limbs(a, b):
+    product = np.zeros((2 * LIMBS + 1, a.shape[1]), dtype=np.uint64)
+
+    for i in range(LIMBS):
+        product[i:i + LIMBS] += a[i] * b
+
+    return propagate_carries(product)
+
+
+# Folds everything above 2^256 back down using 2^256 = c (mod p)
+def reduce_limbs(t, c_limbs):
+    while t.shape[0] > LIMBS:
+        high = t[LIMBS:]
+        if not high.any():
+            break
+
+        width = max(LIMBS, high.shape[0] + len(c_limbs)) + 1
+        folded = np.zeros((width, t.shape[1]), dtype=np.uint64)
+        folded[:LIMBS] = t[:LIMBS]
+
+        for i, c_limb in enumerate(c_limbs):
+            if c_limb:
+                folded[i:i + high.shape[0]] += high * np.uint64(c_limb)
+
+        t = propagate_carries(folded)
+
+    return t[:LIMBS]
+
+
+# Maps a value in [0, 2^256) to [0, p): v >= p exactly when v + c overflows 2^256
+def canonical_limbs(v, c_limbs):
+    shifted = np.zeros((LIMBS + 1, v.shape[1]), dtype=np.uint64)
+    shifted[:LIMBS] = v
+    shifted[:len(c_limbs)] += np.asarray(c_limbs, dtype=np.uint64)[:, None]
+    propagate_carries(shifted)
+
+    overflow = shifted[LIMBS] > 0
+
+    return np.where(overflow, shifted[:LIMBS], v)
+
+
+def validate_limbs(points, p, b=7):
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+
+    c_limbs = int_to_limbs(2 ** LIMB_FIELD_BITS - p, LIMBS)
+    while len(c_limbs) > 1 and c_limbs[-1] == 0:
+        c_limbs.pop()
+
+    x = to_limbs([point[0] for point in points], p)
+    y = to_limbs([point[1] for point in points], p)
+
+    x_squared = reduce_limbs(multiply_limbs(x, x), c_limbs)
+    x_cubed = multiply_limbs(x_squared, x)
+    x_cubed[:LIMBS] += np.asarray(int_to_limbs(b % p, LIMBS), dtype=np.uint64)[:, None]
+    right_side = reduce_limbs(propagate_carries(x_cubed), c_limbs)
+    left_side = reduce_limbs(multiply_limbs(y, y), c_limbs)
+
+    right_side = canonical_limbs(right_side, c_limbs)
+    left_side = canonical_limbs(left_side, c_limbs)
+
+    return (right_side == left_side).all(axis=0)
+
+
+class TestClass:
+    def test_validate_small_field(self):
+        expected = [True, True, False, True, False]
+        points = [(192, 105), (17, 56), (200, 119), (1, 193), (42, 99)]
+        prime_num = 223
+        result = validate_points(points, prime_num)
+
+        assert expected == result.tolist()
+
+    def test_validate_small_field_indices(self):
+        expected = [2, 4]
+        points = [(192, 105), (17, 56), (200, 119), (1, 193), (42, 99)]
+        prime_num = 223
+        mask, result = validate_points(points, prime_num, return_indices=True)
+
+        assert expected == result.tolist()
+
+    def test_validate_small_field_f137(self):
+        expected = [True]
+        result = validate_points([(73, 128)], 137)
+
+        assert expected == result.tolist()
+
+    def test_validate_secp256k1_limbs(self):
+        from secp256k1 import P, batch_multiply_generator
+        points = batch_multiply_generator([1, 7, 1485, 2 ** 128, 2 ** 240 + 2 ** 31, P - 5])
+        points.append((points[0][0], points[0][1] + 1))
+        points.append((0, 0))
+        points.append((P - 1, P - 1))
+        expected = [True] * 6 + [False] * 3
+        result = validate_points(points, P, use_limbs=True)
+
+        assert is_pseudo_mersenne(P)
+        assert expected == result.tolist()
+
+    def test_validate_limbs_matches_python(self):
+        import random
+        from secp256k1 import P
+        rng = random.Random(1)
+        points = [(rng.randrange(P), rng.randrange(P)) for _ in range(200)]
+        assert validate_python(points, P).tolist() == validate_limbs(points, P).tolist()
+
+    def test_validate_limbs_random_curve_constant(self):
+        # Picking b = y^2 - x^3 puts any (x, y) on the curve, which exercises the full reduction
+        import random
+        from secp256k1 import P
+        rng = random.Random(2)
+
+        for _ in range(50):
+            x, y = rng.randrange(P), rng.randrange(P)
+            b = (y * y - x ** 3) % P
+            assert validate_limbs([(x, y), (x, y + 1)], P, b).tolist() == [True, False]
+
+    def test_validate_with_a_coefficient(self):
+        from curve import TEST_CURVE_F17
+        from secp256k1 import multiply_generator
+        points = [multiply_generator(k, TEST_CURVE_F17) for k in range(1, 19)] + [(5, 2)]
+        expected = [True] * 18 + [False]
+
+        assert expected == validate_points(points, 17, b=2, a=2).tolist()
+        assert expected == validate_python(points, 17, b=2, a=2).tolist()
+
+    def test_validate_python_fallback(self):
+        # 2^255 - 19 is not of the 2^256 - c form, so it takes the Python path
+        p = 2 ** 255 - 19
+        expected = [True, False]
+        result = validate_points([(0, 0), (1, 2)], p, b=0)
+
+        assert expected == result.tolist()
@@ -0,0 +1,329 @@
+import hashlib
+import hmac
+import secrets
+
+from curve import SECP256K1
+from field import batch_inverse
+from msm import multi_scalar_multiply_jacobian
+from secp256k1 import multiply_generator_jacobian, double_multiply_jacobian, to_affine, decompress_point, negate
+
+# ECDSA over the native point engine, secp256k1 by default
+# Signing: k from RFC 6979 (deterministic, HMAC-SHA256), R = k * G from the fixed-base table,
+#          r = R.x mod n, s = k^-1 (z + r * d) mod n, s is normalized to the lower half (BIP 62 low-s)
+# Verifying: R = u1 * G + u2 * Q in one joint Strauss-Shamir multiplication (secp256k1.double_multiply_jacobian)
+#            and R.x is compared in Jacobian form, r * Z^2 == X, so no field inversion is needed.
+
+# message_hash is the digest bytes (e.g. hashlib.sha256(message).digest()), signatures are (r, s) int tuples.
+# sign_recoverable also returns the recovery id: bit 0 is the parity of R.y, bit 1 is set when R.x >= n.
+
+# Batch verification: with the recovery id each signature pins down the full point R, not just R.x,
+# so a valid signature satisfies u1 * G + u2 * Q - R = 0 exactly. Weighting every equation with a random
+# 128 bit a_i and summing gives one Pippenger multi-scalar multiplication (msm.py) over G, every Q and every R:
+#   (sum a_i * u1_i) * G + sum (a_i * u2_i) * Q_i - sum a_i * R_i = 0
+# A forged signature only passes if it cancels against the random weights, a 2^-128 chance.
+# A failing batch is split in half and each half checked again, down to single signatures,
+# which get the regular verify so the per-item results always agree with verify.
+# Signatures without a usable recovery id can't be batched and are verified one by one.
+
+BATCH_WEIGHT_BITS = 128
+
+
+# RFC 6979 section 2.3 conversions
+def bits_to_int(data, curve=SECP256K1):
+    value = int.from_bytes(data, 'big')
+    excess = len(data) * 8 - curve.n.bit_length()
+
+    return value >> excess if excess > 0 else value
+
+
+def int_to_octets(value, curve=SECP256K1):
+    return value.to_bytes((curve.n.bit_length() + 7) // 8, 'big')
+
+
+def bits_to_octets(data, curve=SECP256K1):
+    return int_to_octets(bits_to_int(data, curve) % curve.n, curve)
+
+
+# RFC 6979 section 3.2: candidate nonces, in order, for a private key and message hash
+def rfc6979_nonces(private_key, message_hash, curve=SECP256K1, hash_function=hashlib.sha256):
+    digest_size = hash_function().digest_size
+    v = b'\x01' * digest_size
+    k = b'\x00' * digest_size
+    seed = int_to_octets(private_key, curve) + bits_to_octets(message_hash, curve)
+
+    k = hmac.new(k, v + b'\x00' + seed, hash_function).digest()
+    v = hmac.new(k, v, hash_function).digest()
+    k = hmac.new(k, v + b'\x01' + seed, hash_function).digest()
+    v = hmac.new(k, v, hash_function).digest()
+
+    size = (curve.n.bit_length() + 7) // 8
+
+    while True:
+        t = b''
+        while len(t) < size:
+            v = hmac.new(k, v, hash_function).digest()
+            t += v
+
+        nonce = bits_to_int(t, curve)
+        if 1 <= nonce < curve.n:
+            yield nonce
+
+        k = hmac.new(k, v + b'\x00', hash_function).digest()
+        v = hmac.new(k, v, hash_function).digest()
+
+
+def sign_recoverable(private_key, message_hash, curve=SECP256K1, low_s=True):
+    n = curve.n
+
+    if not 1 <= private_key < n:
+        raise ValueError("Private key out of range")
+
+    z = bits_to_int(message_hash, curve) % n
+
+    for nonce in rfc6979_nonces(private_key, message_hash, curve):
+        x, y = to_affine(multiply_generator_jacobian(nonce, curve), curve)
+        r = x % n
+        if r == 0:
+            continue
+
+        s = pow(nonce, -1, n) * (z + r * private_key) % n
+        if s == 0:
+            continue
+
+        recovery_id = (y & 1) | (2 if x >= n else 0)
+
+        # s and n - s both verify, the low one is canonical. Negating s negates R, so the parity flips.
+        if low_s and s > n // 2:
+            s = n - s
+            recovery_id ^= 1
+
+        return r, s, recovery_id
+
+
+def sign(private_key, message_hash, curve=SECP256K1, low_s=True):
+    r, s, _ = sign_recoverable(private_key, message_hash, curve, low_s)
+
+    return r, s
+
+
+def verify(public_key, message_hash, signature, curve=SECP256K1):
+    n = curve.n
+    p = curve.p
+    r, s = signature[0], signature[1]
+
+    if not (1 <= r < n and 1 <= s < n):
+        return False
+
+    if public_key is None or not curve.contains(public_key):
+        return False
+
+    z = bits_to_int(message_hash, curve) % n
+    w = pow(s, -1, n)
+    x, _, z_coordinate = double_multiply_jacobian(z * w % n, r * w % n, public_key, curve)
+
+    if z_coordinate == 0:
+        return False
+
+    # R.x mod n == r means R.x is r or r + n (the latter only possible when r + n < p)
+    zz = z_coordinate * z_coordinate % p
+    if (r * zz - x) % p == 0:
+        return True
+
+    return r + n < p and ((r + n) * zz - x) % p == 0
+
+
+def batch_verify(items, curve=SECP256K1, rng=None):
+    rng = rng or secrets.SystemRandom()
+    n = curve.n
+    p = curve.p
+    items = list(items)
+    results = [False] * len(items)
+
+    batch = []
+    for i, (message_hash, signature, public_key) in enumerate(items):
+        r, s = signature[0], signature[1]
+
+        # The same range and on-curve checks verify makes, so a key is never accepted by one and not the other
+        if public_key is None or not curve.contains(public_key) or not (1 <= r < n and 1 <= s < n):
+            continue
+
+        # Without a usable recovery id there is no R to batch, the signature may still verify on its own
+        recovery_id = signature[2] if len(signature) > 2 else None
+        r_point = None
+
+        if isinstance(recovery_id, int) and 0 <= recovery_id < 4 and r + n * (recovery_id >> 1) < p:
+            try:
+                r_point = decompress_point(r + n * (recovery_id >> 1), recovery_id & 1, curve)
+            except ValueError:
+                pass
+
+        if r_point is None:
+            results[i] = verify(public_key, message_hash, signature, curve)
+            continue
+
+        batch.append((i, bits_to_int(message_hash, curve) % n, r, s, public_key, r_point))
+
+    inverses = batch_inverse([s for _, _, _, s, _, _ in batch], n)
+    equations = []
+
+    for (i, z, r, s, public_key, r_point), w in zip(batch, inverses):
+        weight = rng.randrange(1, 1 << BATCH_WEIGHT_BITS)
+        equations.append((i, weight * z * w % n, weight * r * w % n, public_key, negate(r_point, curve), weight))
+
+    check_equations(equations, items, results, curve)
+
+    return results
+
+
+def check_equations(equations, items, results, curve):
+    if not equations:
+        return
+
+    if len(equations) == 1:
+        i = equations[0][0]
+        message_hash, signature, public_key = items[i]
+        results[i] = verify(public_key, message_hash, signature, curve)
+        return
+
+    g_scalar = sum(equation[1] for equation in equations)
+    scalars = [g_scalar]
+    points = [curve.g]
+
+    for _, _, q_scalar, public_key, negated_r, weight in equations:
+        scalars += [q_scalar, weight]
+        points += [public_key, negated_r]
+
+    if multi_scalar_multiply_jacobian(scalars, points, curve)[2] == 0:
+        for equation in equations:
+            results[equation[0]] = True
+        return
+
+    middle = len(equations) // 2
+    check_equations(equations[:middle], items, results, curve)
+    check_equations(equations[middle:], items, results, curve)
+
+
+class TestClass:
+    # Widely used secp256k1 RFC 6979 vectors (also produced by pycoin's deterministic_generate_k and sign)
+    def test_rfc6979_nonce(self):
+        expected = 0x8F8A276C19F4149656B280621E358CCE24F5F52542772691EE69063B74F15D15
+        result = next(rfc6979_nonces(1, hashlib.sha256(b'Satoshi Nakamoto').digest()))
+
+        assert expected == result
+
+    def test_sign(self):
+        expected = (0x934B1EA10A4B3C1757E2B0C017D0B6143CE3C9A7E6A4A49860D7A6AB210EE3D8,
+                    0x2442CE9D2B916064108014783E923EC36B49743E2FFA1C4496F01A512AAFD9E5)
+        result = sign(1, hashlib.sha256(b'Satoshi Nakamoto').digest())
+
+        assert expected == result
+
+    def test_sign_low_s(self):
+        expected = (0xFD567D121DB66E382991534ADA77A6BD3106F0A1098C231E47993447CD6AF2D0,
+                    0x6B39CD0EB1BC8603E159EF5C20A5C8AD685A45B06CE9BEBED3F153D10D93BED5)
+        result = sign(0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364140,
+                      hashlib.sha256(b'Satoshi Nakamoto').digest())
+
+        assert expected == result
+
+    def test_sign_and_verify(self):
+        from secp256k1 import multiply_generator
+
+        for private_key in [1, 7, 1485, 2 ** 128, SECP256K1.n - 1]:
+            public_key = multiply_generator(private_key)
+            message_hash = hashlib.sha256(str(private_key).encode()).digest()
+            signature = sign(private_key, message_hash)
+
+            assert verify(public_key, message_hash, signature)
+            assert not verify(public_key, hashlib.sha256(b'other').digest(), signature)
+            assert not verify(multiply_generator(private_key + 1), message_hash, signature)
+
+    def test_verify_rejects_bad_inputs(self):
+        from secp256k1 import G
+        message_hash = hashlib.sha256(b'Satoshi Nakamoto').digest()
+        r, s = sign(1, message_hash)
+
+        assert not verify(G, message_hash, (0, s))
+        assert not verify(G, message_hash, (r, SECP256K1.n))
+        assert not verify((G[0], G[1] + 1), message_hash, (r, s))
+        assert not verify(None, message_hash, (r, s))
+        # The high-s twin of a valid signature still verifies
+        assert verify(G, message_hash, (r, SECP256K1.n - s))
+
+    def test_recovery_id_matches_r_point(self):
+        from secp256k1 import multiply_generator
+
+        for private_key in range(1, 20):
+            message_hash = hashlib.sha256(bytes([private_key])).digest()
+            r, s, recovery_id = sign_recoverable(private_key, message_hash)
+            nonce = next(rfc6979_nonces(private_key, message_hash))
+            x, y = multiply_generator(nonce)
+
+            if s == pow(nonce, -1, SECP256K1.n) * (bits_to_int(message_hash) + r * private_key) % SECP256K1.n:
+                assert recovery_id & 1 == y & 1
+            else:
+                assert recovery_id & 1 != y & 1
+
+    def test_small_curve(self):
+        from curve import TEST_CURVE_F211
+        from secp256k1 import multiply_generator
+        public_key = multiply_generator(42, TEST_CURVE_F211)
+        message_hash = hashlib.sha256(b'small').digest()
+        signature = sign(42, message_hash, TEST_CURVE_F211)
+
+        assert verify(public_key, message_hash, signature, TEST_CURVE_F211)
+
+    def signed_batch(self, count):
+        from secp256k1 import multiply_generator
+        items = []
+
+        for private_key in range(1, count + 1):
+            message_hash = hashlib.sha256(str(private_key).encode()).digest()
+            items.append((message_hash, sign_recoverable(private_key * 7919, message_hash),
+                          multiply_generator(private_key * 7919)))
+
+        return items
+
+    def test_batch_verify_all_valid(self):
+        import random
+        items = self.signed_batch(12)
+        expected = [True] * 12
+        result = batch_verify(items, rng=random.Random(1))
+
+        assert expected == result
+
+    def test_batch_verify_pinpoints_invalid(self):
+        import random
+        items = self.signed_batch(12)
+        r, s, recovery_id = items[3][1]
+        items[3] = (items[3][0], (r, s + 1, recovery_id), items[3][2])
+        items[8] = (hashlib.sha256(b'forged').digest(), items[8][1], items[8][2])
+        expected = [i not in (3, 8) for i in range(12)]
+        result = batch_verify(items, rng=random.Random(2))
+
+        assert expected == result
+
+    def test_batch_verify_matches_verify(self):
+        from secp256k1 import G, P
+        items = self.signed_batch(6)
+        message_hash, (r, s, recovery_id), public_key = items[0]
+        items += [
+            # Recovery ids that name no point (R.x = r + n or r + 3n is past p) or aren't recovery ids at all
+            (message_hash, (r, s, recovery_id | 2), public_key),
+            (message_hash, (r, s, 7), public_key),
+            (message_hash, (r, s, None), public_key),
+            # No recovery id: checked on its own
+            (message_hash, (r, s), public_key),
+            # Wrong recovery id but a valid signature: the batch fails, the single verify passes it
+            (message_hash, (r, s, recovery_id ^ 1), public_key),
+            # Public key off the curve
+            (message_hash, (r, s, recovery_id), (G[0], G[1] + 1)),
+            # Public key with an unreduced x coordinate
+            (message_hash, (r, s, recovery_id), (public_key[0] + P, public_key[1])),
+            (message_hash, (0, s, recovery_id), public_key),
+        ]
+        expected = [verify(public_key, message_hash, signature) for message_hash, signature, public_key in items]
+        result = batch_verify(items)
+
+        assert expected == result
+        assert [True] * 11 + [False, False, False] == result
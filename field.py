@@ -0,0 +1,398 @@
+from functools import lru_cache
+
+# Finite field elements
+# FieldElement(value, prime) holds its value in an internal form picked per prime:
+# - secp256k1's p = 2^256 - 2^32 - 977: plain residues, products reduced with 2^256 = 2^32 + 977 (mod p)
+#   instead of a division
+# - any other odd prime: Montgomery form, value * R mod p with R = 2^bits, products reduced with REDC
+# - even moduli (no Montgomery form): plain residues reduced with %
+# int(element) always converts back to the ordinary residue 0 <= x < p, the same integer the % based
+# finite field functions return.
+
+SECP256K1_P = 2 ** 256 - 2 ** 32 - 977
+SECP256K1_C = 2 ** 32 + 977
+MASK_256 = 2 ** 256 - 1
+
+
+class Secp256k1Reduction:
+    __slots__ = ('prime',)
+
+    def __init__(self):
+        self.prime = SECP256K1_P
+
+    def to_form(self, x):
+        return x % SECP256K1_P
+
+    def from_form(self, x):
+        return x
+
+    # t < p^2: two folds of the bits above 2^256 and one conditional subtraction
+    def reduce(self, t):
+        t = (t & MASK_256) + (t >> 256) * SECP256K1_C
+        t = (t & MASK_256) + (t >> 256) * SECP256K1_C
+
+        return t - SECP256K1_P if t >= SECP256K1_P else t
+
+    def multiply(self, a, b):
+        return self.reduce(a * b)
+
+
+class MontgomeryReduction:
+    __slots__ = ('prime', 'bits', 'mask', 'r_squared', 'p_inverse')
+
+    def __init__(self, prime):
+        self.prime = prime
+        self.bits = prime.bit_length()
+        self.mask = (1 << self.bits) - 1
+        self.r_squared = pow(2, 2 * self.bits, prime)
+        # -p^-1 mod R
+        self.p_inverse = -pow(prime, -1, 1 << self.bits) & self.mask
+
+    def to_form(self, x):
+        return self.reduce(x % self.prime * self.r_squared)
+
+    def from_form(self, x):
+        return self.reduce(x)
+
+    # REDC: t * R^-1 mod p for 0 <= t < p * R
+    def reduce(self, t):
+        m = (t & self.mask) * self.p_inverse & self.mask
+        u = (t + m * self.prime) >> self.bits
+
+        return u - self.prime if u >= self.prime else u
+
+    def multiply(self, a, b):
+        return self.reduce(a * b)
+
+
+class PlainReduction:
+    __slots__ = ('prime',)
+
+    def __init__(self, prime):
+        self.prime = prime
+
+    def to_form(self, x):
+        return x % self.prime
+
+    def from_form(self, x):
+        return x
+
+    def reduce(self, t):
+        return t % self.prime
+
+    def multiply(self, a, b):
+        return a * b % self.prime
+
+
+# Division
+# pow(y, -1, p) runs the extended Euclidean algorithm in C, far cheaper than y^(p-2) for a 256-bit p
+def modular_inverse(y, p):
+    if y % p == 0:
+        raise ZeroDivisionError("0 has no inverse in F{0}".format(p))
+
+    return pow(y, -1, p)
+
+
+# Montgomery's trick: invert every value with a single field inversion
+# Zeros are left as zero so points at infinity can pass through a batch.
+def batch_inverse(values, p):
+    prefix = []
+    accumulator = 1
+
+    for value in values:
+        prefix.append(accumulator)
+        if value % p:
+            accumulator = accumulator * value % p
+
+    accumulator_inv = pow(accumulator, -1, p)
+    inverses = [0] * len(values)
+
+    for i in range(len(values) - 1, -1, -1):
+        value = values[i]
+        if value % p:
+            inverses[i] = accumulator_inv * prefix[i] % p
+            accumulator_inv = accumulator_inv * value % p
+
+    return inverses
+
+
+def batch_division(numerators, denominators, p):
+    if any(denominator % p == 0 for denominator in denominators):
+        raise ZeroDivisionError("Division by 0 in F{0}".format(p))
+
+    return [numerator * inverse % p for numerator, inverse in zip(numerators, batch_inverse(denominators, p))]
+
+
+# Square roots
+# Tonelli-Shanks for any odd prime, None when a is not a square. Primes with p = 3 (mod 4)
+# don't need this, a^((p + 1) / 4) is already a root (see curve.Curve.sqrt_exponent).
+def sqrt_mod_prime(a, p):
+    a %= p
+
+    if a == 0:
+        return 0
+
+    if pow(a, (p - 1) // 2, p) != 1:
+        return None
+
+    q = p - 1
+    s = 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+
+    z = 2
+    while pow(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+
+    m = s
+    c = pow(z, q, p)
+    t = pow(a, q, p)
+    root = pow(a, (q + 1) // 2, p)
+
+    while t != 1:
+        i = 1
+        t_power = t * t % p
+        while t_power != 1:
+            t_power = t_power * t_power % p
+            i += 1
+
+        b = pow(c, 1 << (m - i - 1), p)
+        m = i
+        c = b * b % p
+        t = t * c % p
+        root = root * b % p
+
+    return root
+
+
+@lru_cache(maxsize=None)
+def reduction_for(prime):
+    if prime == SECP256K1_P:
+        return Secp256k1Reduction()
+
+    if prime % 2 == 1 and prime > 1:
+        return MontgomeryReduction(prime)
+
+    return PlainReduction(prime)
+
+
+class FieldElement:
+    __slots__ = ('value', 'reduction')
+
+    def __init__(self, value, prime, reduction=None):
+        self.reduction = reduction or reduction_for(prime)
+        self.value = self.reduction.to_form(value)
+
+    @classmethod
+    def from_internal(cls, value, reduction):
+        element = cls.__new__(cls)
+        element.value = value
+        element.reduction = reduction
+
+        return element
+
+    @property
+    def prime(self):
+        return self.reduction.prime
+
+    def coerce(self, other):
+        if isinstance(other, FieldElement):
+            if other.reduction.prime != self.reduction.prime:
+                raise ValueError("Cannot combine elements of F{0} and F{1}".format(self.prime, other.prime))
+
+            return other.value
+
+        return self.reduction.to_form(other)
+
+    def __int__(self):
+        return self.reduction.from_form(self.value)
+
+    def __index__(self):
+        return int(self)
+
+    def __repr__(self):
+        return "FieldElement({0}, {1})".format(int(self), self.prime)
+
+    # Only elements compare equal, an element == int would have to hash like every int in its residue class.
+    # Compare int(element) to check against a plain integer.
+    def __eq__(self, other):
+        if isinstance(other, FieldElement):
+            return self.prime == other.prime and self.value == other.value
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((int(self), self.prime))
+
+    def __add__(self, other):
+        value = self.value + self.coerce(other)
+        prime = self.reduction.prime
+
+        return FieldElement.from_internal(value - prime if value >= prime else value, self.reduction)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        value = self.value - self.coerce(other)
+
+        return FieldElement.from_internal(value + self.reduction.prime if value < 0 else value, self.reduction)
+
+    def __rsub__(self, other):
+        return FieldElement.from_internal(self.coerce(other), self.reduction) - self
+
+    def __neg__(self):
+        return FieldElement.from_internal(-self.value % self.reduction.prime, self.reduction)
+
+    def __mul__(self, other):
+        return FieldElement.from_internal(self.reduction.multiply(self.value, self.coerce(other)), self.reduction)
+
+    __rmul__ = __mul__
+
+    def __pow__(self, exponent):
+        prime = self.reduction.prime
+
+        return FieldElement(pow(int(self), exponent, prime), prime, self.reduction)
+
+    def inverse(self):
+        prime = self.reduction.prime
+
+        return FieldElement(modular_inverse(int(self), prime), prime, self.reduction)
+
+    def __truediv__(self, other):
+        if not isinstance(other, FieldElement):
+            other = FieldElement(other, self.prime, self.reduction)
+
+        return self * other.inverse()
+
+    def __rtruediv__(self, other):
+        return FieldElement(other, self.prime, self.reduction) * self.inverse()
+
+
+class TestClass:
+    def test_add(self):
+        expected = 17
+        result = int(FieldElement(11, 19) + FieldElement(6, 19))
+
+        assert expected == result
+
+    def test_add_negative(self):
+        expected = 11
+        result = int(FieldElement(4, 19) + (-12))
+
+        assert expected == result
+
+    def test_subtract(self):
+        expected = 13
+        result = int(FieldElement(6, 19) - 12)
+
+        assert expected == result
+        assert 6 == int(18 - FieldElement(12, 19))
+
+    def test_multiply(self):
+        expected = 22
+        result = int(FieldElement(24, 31) * FieldElement(19, 31))
+
+        assert expected == result
+
+    def test_pow(self):
+        expected = 15
+        result = int(FieldElement(17, 31) ** 3)
+
+        assert expected == result
+
+    def test_divide(self):
+        expected = 4
+        result = int(FieldElement(3, 31) / 24)
+
+        assert expected == result
+        assert 7 == int(2 / FieldElement(3, 19))
+
+    def test_divide_by_zero(self):
+        try:
+            FieldElement(3, 19) / 0
+            assert False
+        except ZeroDivisionError:
+            pass
+
+    def test_modular_inverse(self):
+        expected = pow(3, SECP256K1_P - 2, SECP256K1_P)
+        result = modular_inverse(3, SECP256K1_P)
+
+        assert expected == result
+
+    def test_batch_inverse(self):
+        expected = [pow(3, -1, 19), 0, pow(7, -1, 19), 18]
+        result = batch_inverse([3, 0, 7, 18], 19)
+
+        assert expected == result
+
+    def test_batch_division(self):
+        expected = [7, 4, 12]
+        result = batch_division([2, 3, 3], [3, 15, 24], 19)
+
+        assert expected == result
+
+    def test_batch_division_by_zero(self):
+        try:
+            batch_division([1, 2], [3, 19], 19)
+            assert False
+        except ZeroDivisionError:
+            pass
+
+    def test_sqrt_mod_prime(self):
+        for p in [17, 41, 223, 2 ** 255 - 19]:
+            for a in range(1, 40):
+                root = sqrt_mod_prime(a, p)
+
+                if pow(a, (p - 1) // 2, p) in (0, 1):
+                    assert root * root % p == a % p
+                else:
+                    assert root is None
+
+    def test_equality(self):
+        assert FieldElement(5, 19) == FieldElement(24, 19)
+        assert FieldElement(5, 19) != FieldElement(5, 23)
+        assert FieldElement(5, 19) != 5
+        assert 5 == int(FieldElement(24, 19))
+
+    def test_hash_matches_equality(self):
+        assert hash(FieldElement(5, 19)) == hash(FieldElement(24, 19))
+        assert 1 == len({FieldElement(5, 19), FieldElement(24, 19)})
+        assert 2 == len({FieldElement(5, 19), 5})
+
+    def test_slots(self):
+        element = FieldElement(5, 19)
+
+        assert not hasattr(element, '__dict__')
+
+    def test_mixing_fields_fails(self):
+        try:
+            FieldElement(1, 19) + FieldElement(1, 23)
+            assert False
+        except ValueError:
+            pass
+
+    def test_reductions_match_modulo(self):
+        import random
+        rng = random.Random(7)
+
+        for prime in [19, 223, 2 ** 127 - 1, 2 ** 255 - 19, SECP256K1_P]:
+            for _ in range(100):
+                a, b = rng.randrange(prime), rng.randrange(prime)
+                x, y = FieldElement(a, prime), FieldElement(b, prime)
+
+                assert int(x * y) == a * b % prime
+                assert int(x + y) == (a + b) % prime
+                assert int(x - y) == (a - b) % prime
+
+    def test_reduction_selection(self):
+        assert isinstance(reduction_for(SECP256K1_P), Secp256k1Reduction)
+        assert isinstance(reduction_for(223), MontgomeryReduction)
+        assert isinstance(reduction_for(20), PlainReduction)
+
+    def test_secp256k1_reduction_edges(self):
+        reduction = reduction_for(SECP256K1_P)
+
+        assert reduction.multiply(SECP256K1_P - 1, SECP256K1_P - 1) == 1
+        assert reduction.reduce(SECP256K1_P) == 0
@@ -0,0 +1,225 @@
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter_ns
+
+# Opt-in instrumentation: call counters, per-function timing histograms and step counts
+# Nothing is recorded until enable() installs a Recorder. While disabled an @instrumented function
+# costs one extra call and a global check, and increment/record_steps return straight away.
+
+# Histograms bucket values by bit length, bucket k holds values in [2^(k-1), 2^k)
+# so timings in nanoseconds from 1 ns to ~584 years fit in HISTOGRAM_BUCKETS buckets.
+HISTOGRAM_BUCKETS = 65
+
+_recorder = None
+
+
+class Histogram:
+    __slots__ = ('buckets', 'count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+
+    def record(self, value):
+        self.buckets[min(int(value).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += value
+
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    # Upper bound of the bucket holding the given quantile, e.g. quantile(0.99) for p99
+    def quantile(self, q):
+        if not self.count:
+            return 0
+
+        rank = q * self.count
+        seen = 0
+
+        for k, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(2 ** k - 1, self.maximum)
+
+        return self.maximum
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean(),
+            'min': self.minimum,
+            'max': self.maximum,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+        self.steps = {}
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_time(self, name, nanoseconds):
+        histogram = self.timings.get(name)
+        if histogram is None:
+            histogram = self.timings[name] = Histogram()
+
+        histogram.record(nanoseconds)
+
+    def record_steps(self, name, steps):
+        histogram = self.steps.get(name)
+        if histogram is None:
+            histogram = self.steps[name] = Histogram()
+
+        histogram.record(steps)
+
+    def snapshot(self):
+        return {
+            'counters': dict(self.counters),
+            'timings_ns': {name: histogram.summary() for name, histogram in self.timings.items()},
+            'steps': {name: histogram.summary() for name, histogram in self.steps.items()},
+        }
+
+
+def enable(recorder=None):
+    global _recorder
+    _recorder = recorder or Recorder()
+
+    return _recorder
+
+
+def disable():
+    global _recorder
+    recorder, _recorder = _recorder, None
+
+    return recorder
+
+
+def get_recorder():
+    return _recorder
+
+
+# Enable for the duration of a with block, restoring whatever recorder was installed before
+@contextmanager
+def recording(recorder=None):
+    global _recorder
+    previous = _recorder
+    _recorder = recorder or Recorder()
+
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+def increment(name, amount=1):
+    if _recorder is not None:
+        _recorder.increment(name, amount)
+
+
+def record_steps(name, steps):
+    if _recorder is not None:
+        _recorder.record_steps(name, steps)
+
+
+# Counts calls and times them into a histogram under name (the function name by default).
+# With returns_steps=True the function returns (result, steps) like quick.py and the steps are recorded too.
+def instrumented(name=None, returns_steps=False):
+    def decorator(function):
+        label = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return function(*args, **kwargs)
+
+            # Calls that raise are still counted and timed
+            start = perf_counter_ns()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                recorder.record_time(label, perf_counter_ns() - start)
+                recorder.increment(label + '.calls')
+
+            if returns_steps:
+                recorder.record_steps(label, result[1])
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class TestClass:
+    def test_disabled_records_nothing(self):
+        @instrumented()
+        def square(x):
+            return x * x
+
+        disable()
+        increment('ignored')
+        record_steps('ignored', 3)
+
+        assert 9 == square(3)
+        assert None is get_recorder()
+
+    def test_counters_timings_and_steps(self):
+        @instrumented('check', returns_steps=True)
+        def check(n):
+            return n > 1, n
+
+        with recording() as recorder:
+            check(5)
+            check(12)
+            increment('custom', 2)
+
+        snapshot = recorder.snapshot()
+
+        assert 2 == snapshot['counters']['check.calls']
+        assert 2 == snapshot['counters']['custom']
+        assert 2 == snapshot['timings_ns']['check']['count']
+        assert 17 == snapshot['steps']['check']['total']
+        assert 12 == snapshot['steps']['check']['max']
+        assert None is get_recorder()
+
+    def test_recording_restores_previous_recorder(self):
+        outer = enable()
+
+        with recording() as inner:
+            increment('x')
+
+        assert outer is get_recorder()
+        assert 'x' in inner.counters
+        assert 'x' not in outer.counters
+        disable()
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram()
+        for value in [1, 2, 3, 100, 1000]:
+            histogram.record(value)
+
+        assert 3 == histogram.quantile(0.5)
+        assert 1000 == histogram.quantile(1.0)
+        assert 0 == Histogram().quantile(0.5)
+
+    def test_wraps_keeps_name(self):
+        @instrumented()
+        def named():
+            return None
+
+        assert 'named' == named.__name__
@@ -0,0 +1,92 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from secp256k1 import batch_multiply_generator, get_generator_table
+from table_cache import ensure_generator_table, install_generator_table
+
+# Multi-process public key derivation
+# Private keys are read from the iterable one chunk at a time, each chunk is derived in a worker process
+# and results are yielded in input order. At most max_in_flight chunks are pending at once,
+# so memory stays flat however large the input range is.
+# With table_path every worker memory-maps the cached generator table (see table_cache.py)
+# instead of building its own copy.
+
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def derive_chunk(chunk):
+    return list(zip(chunk, batch_multiply_generator(chunk)))
+
+
+def derive_public_keys(private_keys, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=None,
+                       table_path=None):
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+
+    # Build or map the generator table once per worker, before the first chunk arrives
+    if table_path is None:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=get_generator_table)
+    else:
+        # Written once here so the workers only ever map it
+        ensure_generator_table(table_path)
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=install_generator_table,
+                                       initargs=(table_path,))
+    pending = deque()
+
+    try:
+        for chunk in chunked(private_keys, chunk_size):
+            pending.append(executor.submit(derive_chunk, chunk))
+
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class TestClass:
+    def test_chunked(self):
+        expected = [[1, 2], [3, 4], [5]]
+        result = list(chunked(range(1, 6), 2))
+
+        assert expected == result
+
+    def test_derive_chunk(self):
+        expected = [(7, (0x5CBDF0646E5DB4EAA398F365F2EA7A0E3D419B7E0330E39CE92BDDEDCAC4F9BC,
+                         0x6AEBCA40BA255960A3178D6D861A54DBA813D0B813FDE7B5A5082628087264DA))]
+        result = derive_chunk([7])
+
+        assert expected == result
+
+    def test_derive_public_keys_keeps_input_order(self):
+        private_keys = [7, 1485, 2 ** 128, 2 ** 240 + 2 ** 31, 999 ** 3, 123, 42424242]
+        expected = list(zip(private_keys, batch_multiply_generator(private_keys)))
+        result = list(derive_public_keys(iter(private_keys), workers=2, chunk_size=2, max_in_flight=2))
+
+        assert expected == result
+
+    def test_derive_public_keys_with_mapped_table(self):
+        import tempfile
+        private_keys = [7, 1485, 2 ** 128, 123]
+        expected = list(zip(private_keys, batch_multiply_generator(private_keys)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = list(derive_public_keys(private_keys, workers=2, chunk_size=2,
+                                             table_path=os.path.join(directory, 'table.bin')))
+
+        assert expected == result
@@ -0,0 +1,235 @@
+from heapq import heapify, heappop, heappush, heapreplace
+
+from curve import SECP256K1
+from secp256k1 import INFINITY, to_jacobian, to_affine, jacobian_add, jacobian_add_affine, jacobian_double
+from secp256k1 import negate, scalar_multiply_jacobian
+
+# Multi-scalar multiplication: k1 * P1 + k2 * P2 + ... + kn * Pn in one pass
+
+# Bos-Coster: keep the (scalar, point) pairs in a max-heap and repeatedly rewrite the two largest,
+#   k1 * P1 + k2 * P2 = (k1 - q * k2) * P1 + k2 * (P2 + q * P1)   with q = k1 // k2
+# Every step shrinks the largest scalar, usually to below the second largest, with one point addition
+# (q is almost always 1 once there are a few dozen points). When one pair is left it is finished with a
+# regular wNAF scalar multiplication.
+
+# Pippenger (bucket method): cut every scalar into signed c-bit digits. For each window, drop every point into
+# the bucket of its digit (negated for negative digits), then sum the buckets weighted by their digit with two
+# running sums, sum(d * B_d) = B_top + (B_top + B_top-1) + ... Windows are combined with c doublings each.
+# Cost in point operations, with b-bit scalars and 2^(c-1) buckets per window:
+#   (b / c + 1) * (count + 2 * 2^(c-1)) + b
+# pippenger_cost is that model, best_window picks the c that minimizes it for a given number of points.
+
+# multi_scalar_multiply uses Pippenger with the modelled window: in python bench.py msm it beats Bos-Coster
+# at every size from 2 points up, Bos-Coster is kept as the reference implementation.
+MAX_WINDOW_BITS = 20
+
+
+def bos_coster_jacobian(scalars, points, curve=SECP256K1):
+    n = curve.n
+    jacobian_points = []
+    heap = []
+
+    for scalar, point in zip(scalars, points):
+        scalar %= n
+        if scalar == 0 or point is None:
+            continue
+
+        heap.append((-scalar, len(jacobian_points)))
+        jacobian_points.append(to_jacobian(point))
+
+    if not heap:
+        return INFINITY
+
+    heapify(heap)
+
+    while len(heap) > 1:
+        k1, i1 = heappop(heap)
+        k2, i2 = heap[0]
+        k1, k2 = -k1, -k2
+
+        q, remainder = divmod(k1, k2)
+        p1 = jacobian_points[i1]
+
+        if q == 1:
+            jacobian_points[i2] = jacobian_add(jacobian_points[i2], p1, curve)
+        else:
+            jacobian_points[i2] = jacobian_add(jacobian_points[i2], scalar_multiply_jacobian(q, to_affine(p1, curve),
+                                                                                             curve=curve), curve)
+
+        # The second largest keeps its scalar, its point absorbed q * P1
+        heapreplace(heap, (-k2, i2))
+
+        if remainder:
+            heappush(heap, (-remainder, i1))
+
+    k, i = heap[0]
+
+    return scalar_multiply_jacobian(-k, to_affine(jacobian_points[i], curve), curve=curve)
+
+
+def pippenger_cost(count, window_bits, scalar_bits=256):
+    windows = scalar_bits // window_bits + 1
+
+    return windows * (count + 2 * (1 << (window_bits - 1))) + scalar_bits
+
+
+def best_window(count, scalar_bits=256):
+    return min(range(1, MAX_WINDOW_BITS + 1), key=lambda c: pippenger_cost(count, c, scalar_bits))
+
+
+# Signed base 2^c digits, least significant first, each in (-2^(c-1), 2^(c-1)]
+def signed_digits(k, window_bits, windows):
+    mask = (1 << window_bits) - 1
+    half = 1 << (window_bits - 1)
+    digits = []
+
+    for _ in range(windows):
+        digit = k & mask
+        k >>= window_bits
+
+        if digit > half:
+            digit -= 1 << window_bits
+            k += 1
+
+        digits.append(digit)
+
+    return digits
+
+
+def pippenger_jacobian(scalars, points, curve=SECP256K1, window_bits=None):
+    n = curve.n
+    pairs = [(scalar % n, point) for scalar, point in zip(scalars, points) if point is not None and scalar % n]
+
+    if not pairs:
+        return INFINITY
+
+    scalar_bits = n.bit_length()
+    window_bits = window_bits or best_window(len(pairs), scalar_bits)
+    windows = scalar_bits // window_bits + 1
+    bucket_count = 1 << (window_bits - 1)
+
+    digit_rows = [signed_digits(scalar, window_bits, windows) for scalar, _ in pairs]
+    affine_points = [point for _, point in pairs]
+    negated_points = [negate(point, curve) for point in affine_points]
+    result = INFINITY
+
+    for w in range(windows - 1, -1, -1):
+        for _ in range(window_bits):
+            result = jacobian_double(result, curve)
+
+        buckets = [INFINITY] * (bucket_count + 1)
+
+        for digits, point, negated in zip(digit_rows, affine_points, negated_points):
+            digit = digits[w]
+            if digit > 0:
+                buckets[digit] = jacobian_add_affine(buckets[digit], point, curve)
+            elif digit < 0:
+                buckets[-digit] = jacobian_add_affine(buckets[-digit], negated, curve)
+
+        running = INFINITY
+        total = INFINITY
+
+        for digit in range(bucket_count, 0, -1):
+            running = jacobian_add(running, buckets[digit], curve)
+            total = jacobian_add(total, running, curve)
+
+        result = jacobian_add(result, total, curve)
+
+    return result
+
+
+def multi_scalar_multiply_jacobian(scalars, points, curve=SECP256K1):
+    return pippenger_jacobian(scalars, points, curve)
+
+
+def multi_scalar_multiply(scalars, points, curve=SECP256K1):
+    return to_affine(multi_scalar_multiply_jacobian(scalars, points, curve), curve)
+
+
+class TestClass:
+    def naive(self, scalars, points, curve=SECP256K1):
+        from secp256k1 import scalar_multiply, point_add
+        result = None
+
+        for scalar, point in zip(scalars, points):
+            result = point_add(result, scalar_multiply(scalar, point, curve=curve), curve)
+
+        return result
+
+    def test_bos_coster_matches_naive(self):
+        import random
+        from secp256k1 import batch_multiply_generator
+        rng = random.Random(9)
+
+        for count in [1, 2, 3, 10, 40]:
+            points = batch_multiply_generator([rng.randrange(1, SECP256K1.n) for _ in range(count)])
+            scalars = [rng.randrange(SECP256K1.n) for _ in range(count)]
+
+            assert self.naive(scalars, points) == to_affine(bos_coster_jacobian(scalars, points))
+
+    # Far apart scalars take the q > 1 branch of Bos-Coster
+    def test_mixed_scalar_sizes(self):
+        from secp256k1 import batch_multiply_generator
+        points = batch_multiply_generator([3, 5, 7, 11])
+        scalars = [2 ** 255 + 1, 3, 2 ** 128, 1]
+        expected = self.naive(scalars, points)
+
+        assert expected == to_affine(bos_coster_jacobian(scalars, points))
+        assert expected == multi_scalar_multiply(scalars, points)
+
+    def test_pippenger_matches_naive(self):
+        import random
+        from secp256k1 import batch_multiply_generator
+        rng = random.Random(10)
+
+        for count in [1, 2, 5, 30]:
+            points = batch_multiply_generator([rng.randrange(1, SECP256K1.n) for _ in range(count)])
+            scalars = [rng.randrange(SECP256K1.n) for _ in range(count)]
+            expected = self.naive(scalars, points)
+
+            assert expected == to_affine(pippenger_jacobian(scalars, points))
+
+            for window_bits in [1, 4, 7]:
+                assert expected == to_affine(pippenger_jacobian(scalars, points, window_bits=window_bits))
+
+    def test_multi_scalar_multiply_many_points(self):
+        import random
+        from secp256k1 import batch_multiply_generator, multiply_generator
+        rng = random.Random(11)
+        private_keys = [rng.randrange(1, SECP256K1.n) for _ in range(70)]
+        points = batch_multiply_generator(private_keys)
+        scalars = [rng.randrange(SECP256K1.n) for _ in private_keys]
+        expected = multiply_generator(sum(k * d for k, d in zip(scalars, private_keys)))
+
+        assert expected == multi_scalar_multiply(scalars, points)
+        assert expected == to_affine(bos_coster_jacobian(scalars, points))
+
+    def test_signed_digits(self):
+        for k in [0, 1, 2 ** 255 + 12345, SECP256K1.n - 1]:
+            for window_bits in [1, 3, 5, 13]:
+                digits = signed_digits(k, window_bits, 256 // window_bits + 1)
+
+                assert k == sum(digit << (window_bits * i) for i, digit in enumerate(digits))
+                assert all(abs(digit) <= 1 << (window_bits - 1) for digit in digits)
+
+    def test_best_window_grows_with_count(self):
+        windows = [best_window(count) for count in [2, 100, 10000, 1000000]]
+
+        assert windows == sorted(windows)
+        assert pippenger_cost(10000, best_window(10000)) <= pippenger_cost(10000, 8)
+
+    def test_cancels_to_infinity(self):
+        from secp256k1 import G, negate
+
+        assert None is multi_scalar_multiply([5, 5], [G, negate(G)])
+        assert None is multi_scalar_multiply([], [])
+        assert None is multi_scalar_multiply([0, 7], [G, None])
+        assert INFINITY == pippenger_jacobian([5, 5], [G, negate(G)])
+
+    def test_small_curve(self):
+        from curve import TEST_CURVE_F17
+        from secp256k1 import multiply_generator
+        points = [multiply_generator(k, TEST_CURVE_F17) for k in [1, 2, 5, 9]]
+        scalars = [3, 18, 7, 11]
+
+        assert self.naive(scalars, points, TEST_CURVE_F17) == multi_scalar_multiply(scalars, points, TEST_CURVE_F17)
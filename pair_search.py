@@ -0,0 +1,116 @@
+import numpy as np
+
+# Vectorized version of scholarship_question.brute_force_solution
+# Pair sums are evaluated one tile_size x tile_size block at a time, so the full n x n matrix is never built
+# and each block stays in cache. Tiles whose smallest possible sum can't beat the best pair so far are skipped.
+# Ties are broken like the Python loop: the pair with the lowest i, then the lowest j, wins.
+
+DEFAULT_TILE_SIZE = 256
+
+
+def vectorized_brute_force_solution(input_TXs, target, tile_size=DEFAULT_TILE_SIZE):
+    values = np.asarray(input_TXs)
+    n = len(values)
+    lowest_possible_inputs = (0, 0)
+
+    if n < 2:
+        return lowest_possible_inputs
+
+    starts = range(0, n, tile_size)
+    tile_mins = [values[start:start + tile_size].min() for start in starts]
+    tile_maxes = [values[start:start + tile_size].max() for start in starts]
+    upper_triangle = np.triu(np.ones((tile_size, tile_size), dtype=bool), k=1)
+
+    best_sum = None
+    best_i = best_j = None
+
+    for row, i0 in enumerate(starts):
+        a = values[i0:i0 + tile_size]
+
+        for column in range(row, len(starts)):
+            if tile_maxes[row] + tile_maxes[column] < target:
+                continue
+
+            if best_sum is not None and tile_mins[row] + tile_mins[column] > best_sum:
+                continue
+
+            j0 = starts[column]
+            b = values[j0:j0 + tile_size]
+            sums = a[:, None] + b[None, :]
+            valid = sums >= target
+
+            if row == column:
+                valid &= upper_triangle[:len(a), :len(b)]
+
+            if not valid.any():
+                continue
+
+            tile_best = sums[valid].min()
+
+            if best_sum is not None and tile_best > best_sum:
+                continue
+
+            # First (i, j) in row-major order is the lowest i, then the lowest j, within this tile
+            flat = np.flatnonzero(valid & (sums == tile_best))[0]
+            i = i0 + flat // len(b)
+            j = j0 + flat % len(b)
+
+            if best_sum is None or tile_best < best_sum or (i, j) < (best_i, best_j):
+                best_sum = tile_best
+                best_i, best_j = i, j
+
+        # Later row bands only hold larger i, so an exact match can't be beaten or out-tied
+        if best_sum == target:
+            break
+
+    if best_sum is None:
+        return lowest_possible_inputs
+
+    return values[best_i].item(), values[best_j].item()
+
+
+class TestClass:
+    def test_vectorized_brute_force_solution(self):
+        expected = 0.5, 0.9
+        input_TXs = [2, 0.5, 5, 3, 0.9]
+        target = 0.71
+        result = vectorized_brute_force_solution(input_TXs, target)
+
+        assert expected == result
+
+    def test_no_pair(self):
+        expected = 0, 0
+        input_TXs = [0.1, 0.2, 0.3, 0.35]
+        target = 0.71
+
+        assert expected == vectorized_brute_force_solution(input_TXs, target)
+        assert expected == vectorized_brute_force_solution([0.5], target)
+
+    def test_satoshi_buffer(self):
+        from scholarship_question import satoshi_array, satoshi_view, to_satoshis
+        expected = 50000000, 90000000
+        input_TXs = satoshi_view(satoshi_array([2, 0.5, 5, 3, 0.9]))
+        result = vectorized_brute_force_solution(input_TXs, to_satoshis(0.71))
+
+        assert expected == result
+
+    def test_matches_brute_force_with_ties(self):
+        import random
+        from scholarship_question import brute_force_solution
+        rng = random.Random(6)
+
+        for _ in range(50):
+            input_TXs = [rng.randint(1, 60) for _ in range(rng.randint(2, 90))]
+            target = rng.randint(1, 130)
+            expected = brute_force_solution(input_TXs, target)
+            result = vectorized_brute_force_solution(input_TXs, target, tile_size=16)
+
+            assert expected == result
+
+    def test_tie_breaks_on_lowest_index(self):
+        # 4 + 6 and 1 + 9 both make 10, the loop finds (4, 6) first
+        expected = 4, 6
+        input_TXs = [4, 1, 6, 9]
+        result = vectorized_brute_force_solution(input_TXs, 10, tile_size=2)
+
+        assert expected == result
@@ -0,0 +1,365 @@
+import math
+from functools import lru_cache
+from itertools import compress
+
+# Primality testing
+# 1. Small primes: a sieve up to SMALL_PRIME_LIMIT, and a single gcd against their product to catch small factors
+# 2. n < 3.18 * 10^23 (covers every 64-bit input): Miller-Rabin with the first 12 prime bases, which is deterministic
+# 3. Anything larger: BPSW - a strong probable prime test to base 2 followed by a strong Lucas test
+# is_prime returns (is_prime, steps) like quick.py, steps counts the gcd / Miller-Rabin / Lucas rounds run.
+
+# Whole ranges are handled by a segmented sieve instead: primes_in_range streams the primes in [lo, hi)
+# and prime_table builds a cached lookup table, both using at most segment_size bytes per segment.
+# The table keeps one bit per odd number, (hi - lo) / 16 bytes, and refuses ranges that would need more than
+# PRIME_TABLE_MAX_BYTES, so the cache holds at most PRIME_TABLE_CACHE_SIZE * PRIME_TABLE_MAX_BYTES.
+# Wider ranges (e.g. all of [0, 10^10)) have to be streamed with primes_in_range.
+
+SMALL_PRIME_LIMIT = 1000
+
+DEFAULT_SEGMENT_SIZE = 2 ** 20
+PRIME_TABLE_CACHE_SIZE = 8
+# 16 MB, a span of up to ~2.7 * 10^8 numbers per table
+PRIME_TABLE_MAX_BYTES = 2 ** 24
+
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+# Smallest strong pseudoprime to all of the bases above (= 399165290221 * 798330580441)
+DETERMINISTIC_LIMIT = 318665857834031151167461
+
+
+def sieve(limit):
+    is_prime = bytearray([1]) * (limit + 1)
+    is_prime[0:2] = b'\x00\x00'
+
+    for i in range(2, math.isqrt(limit) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+
+    return [i for i in range(limit + 1) if is_prime[i]]
+
+
+SMALL_PRIMES = sieve(SMALL_PRIME_LIMIT)
+SMALL_PRIME_SET = frozenset(SMALL_PRIMES)
+SMALL_PRIMES_PRODUCT = math.prod(SMALL_PRIMES)
+
+
+def is_strong_probable_prime(n, base):
+    d = n - 1
+    s = 0
+
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    x = pow(base, d, n)
+
+    if x == 1 or x == n - 1:
+        return True
+
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+
+    return False
+
+
+def jacobi_symbol(a, n):
+    a %= n
+    result = 1
+
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+
+        a %= n
+
+    return result if n == 1 else 0
+
+
+# Strong Lucas probable prime test with Selfridge's parameters (method A)
+def is_strong_lucas_probable_prime(n):
+    if math.isqrt(n) ** 2 == n:
+        return False
+
+    d_param = 5
+    while True:
+        jacobi = jacobi_symbol(d_param, n)
+        if jacobi == -1:
+            break
+        if jacobi == 0 and abs(d_param) != n:
+            return False
+
+        d_param = -d_param - 2 if d_param > 0 else -d_param + 2
+
+    p_param = 1
+    q_param = (1 - d_param) // 4
+
+    d = n + 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    def half(x):
+        if x % 2:
+            x += n
+        return (x // 2) % n
+
+    u = 1
+    v = p_param
+    q_power = q_param % n
+
+    for bit in bin(d)[3:]:
+        u = u * v % n
+        v = (v * v - 2 * q_power) % n
+        q_power = q_power * q_power % n
+
+        if bit == '1':
+            u, v = half(p_param * u + v), half(d_param * u + p_param * v)
+            q_power = q_power * q_param % n
+
+    if u == 0 or v == 0:
+        return True
+
+    for _ in range(s - 1):
+        v = (v * v - 2 * q_power) % n
+        if v == 0:
+            return True
+
+        q_power = q_power * q_power % n
+
+    return False
+
+
+def is_prime(n):
+    steps = 0
+
+    if n <= SMALL_PRIME_LIMIT:
+        return n in SMALL_PRIME_SET, steps
+
+    # Catch all the small prime factors at once
+    steps += 1
+    if math.gcd(n, SMALL_PRIMES_PRODUCT) != 1:
+        return False, steps
+
+    if n < SMALL_PRIME_LIMIT ** 2:
+        return True, steps
+
+    if n < DETERMINISTIC_LIMIT:
+        for base in MILLER_RABIN_BASES:
+            steps += 1
+            if not is_strong_probable_prime(n, base):
+                return False, steps
+
+        return True, steps
+
+    # BPSW
+    steps += 1
+    if not is_strong_probable_prime(n, 2):
+        return False, steps
+
+    steps += 1
+    return is_strong_lucas_probable_prime(n), steps
+
+
+# Segmented Sieve of Eratosthenes
+def sieve_segment(start, end, base_primes):
+    flags = bytearray([1]) * (end - start)
+
+    for p in base_primes:
+        first = max(p * p, (start + p - 1) // p * p)
+        if first >= end:
+            continue
+
+        flags[first - start::p] = bytes(len(range(first, end, p)))
+
+    # 0 and 1 are not prime
+    for n in range(start, min(end, 2)):
+        flags[n - start] = 0
+
+    return flags
+
+
+def base_primes_for(hi):
+    return sieve(math.isqrt(max(hi - 1, 0)))
+
+
+def primes_in_range(lo, hi, segment_size=DEFAULT_SEGMENT_SIZE):
+    lo = max(lo, 0)
+    base_primes = base_primes_for(hi)
+
+    for start in range(lo, hi, segment_size):
+        end = min(start + segment_size, hi)
+        yield from compress(range(start, end), sieve_segment(start, end, base_primes))
+
+
+# Packs bytes of 0 / 1 into a bitset, flags[i] becomes bit i % 8 of byte i // 8
+BIT_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def pack_bits(flags):
+    if not flags:
+        return b''
+
+    return int(flags[::-1].translate(BIT_DIGITS), 2).to_bytes((len(flags) + 7) // 8, 'little')
+
+
+# Bit i is the odd number first_odd + 2i, even numbers are answered without a lookup (only 2 is prime)
+class PrimeTable:
+    def __init__(self, lo, hi, segment_size=DEFAULT_SEGMENT_SIZE):
+        self.lo = max(lo, 0)
+        self.hi = hi
+        self.first_odd = self.lo | 1
+        odd_count = max(hi - self.first_odd + 1, 0) // 2
+
+        if (odd_count + 7) // 8 > PRIME_TABLE_MAX_BYTES:
+            raise ValueError("[{0}, {1}) needs more than {2} bytes, use primes_in_range for wide ranges".format(
+                lo, hi, PRIME_TABLE_MAX_BYTES))
+
+        # Segments start on odd numbers and hold a multiple of 8 of them, so every packed segment is whole bytes
+        segment_size = max(segment_size // 16 * 16, 16)
+        base_primes = base_primes_for(hi)
+        bits = bytearray()
+
+        for start in range(self.first_odd, hi, segment_size):
+            bits += pack_bits(sieve_segment(start, min(start + segment_size, hi), base_primes)[::2])
+
+        self.bits = bytes(bits)
+
+    def is_prime(self, n):
+        if not self.lo <= n < self.hi:
+            raise ValueError("{0} is outside the table range [{1}, {2})".format(n, self.lo, self.hi))
+
+        if n % 2 == 0:
+            return n == 2
+
+        i = (n - self.first_odd) >> 1
+
+        return self.bits[i >> 3] >> (i & 7) & 1 == 1
+
+    def __contains__(self, n):
+        return self.lo <= n < self.hi and self.is_prime(n)
+
+
+@lru_cache(maxsize=PRIME_TABLE_CACHE_SIZE)
+def prime_table(lo, hi):
+    return PrimeTable(lo, hi)
+
+
+class TestClass:
+    def test_sieve(self):
+        expected = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+        result = sieve(30)
+
+        assert expected == result
+
+    def test_small_numbers(self):
+        expected = [n for n in range(2000) if n > 1 and all(n % i for i in range(2, math.isqrt(n) + 1))]
+        result = [n for n in range(2000) if is_prime(n)[0]]
+
+        assert expected == result
+
+    def test_carmichael_numbers(self):
+        for n in [561, 1105, 1729, 41041, 825265, 321197185]:
+            assert is_prime(n)[0] is False
+
+    def test_strong_pseudoprimes_to_base_2(self):
+        for n in [2047, 3277, 4033, 3215031751, 3825123056546413051]:
+            assert is_strong_probable_prime(n, 2) is True
+            assert is_prime(n)[0] is False
+
+    def test_64_bit_primes(self):
+        for n in [2 ** 61 - 1, 18446744073709551557, 1000000007]:
+            assert is_prime(n)[0] is True
+
+    def test_large_primes(self):
+        for n in [2 ** 127 - 1, 2 ** 255 - 19, 2 ** 256 - 2 ** 32 - 977,
+                  0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141]:
+            assert is_prime(n)[0] is True
+
+    def test_large_composites(self):
+        for n in [(2 ** 61 - 1) * (2 ** 89 - 1), (2 ** 127 - 1) ** 2, 2 ** 256 - 2 ** 32 - 975,
+                  399165290221 * 798330580441]:
+            assert is_prime(n)[0] is False
+
+    def test_lucas_rejects_lucas_pseudoprime_composites(self):
+        # Strong Lucas pseudoprimes are composite but pass the Lucas test on its own
+        for n in [5459, 5777, 10877, 16109, 18971]:
+            assert is_strong_lucas_probable_prime(n) is True
+            assert is_prime(n)[0] is False
+
+    def test_jacobi_symbol(self):
+        expected = [0, 1, -1, -1, 1, 0, 1]
+        result = [jacobi_symbol(a, 5) for a in range(7)]
+
+        assert expected == result
+
+    def test_primes_in_range(self):
+        expected = sieve(10000)
+        result = list(primes_in_range(0, 10001, segment_size=97))
+
+        assert expected == result
+
+    def test_primes_in_range_offset(self):
+        expected = [n for n in range(10 ** 10, 10 ** 10 + 1000) if is_prime(n)[0]]
+        result = list(primes_in_range(10 ** 10, 10 ** 10 + 1000, segment_size=256))
+
+        assert expected == result
+
+    def test_primes_in_range_empty(self):
+        expected = []
+        result = list(primes_in_range(24, 29))
+
+        assert expected == result
+
+    def test_prime_table(self):
+        table = prime_table(1, 100)
+
+        assert table.is_prime(97) is True
+        assert table.is_prime(91) is False
+        assert table.is_prime(1) is False
+        assert 2 in table
+        assert 100 not in table
+        assert table is prime_table(1, 100)
+
+    def test_prime_table_matches_sieve(self):
+        primes = set(sieve(5000))
+
+        for lo, hi, segment_size in [(0, 5000, 16), (1, 4999, 100), (2, 3001, 4096), (7, 8, 16), (30, 30, 16)]:
+            table = PrimeTable(lo, hi, segment_size)
+
+            assert [n for n in range(lo, hi) if n in primes] == [n for n in range(lo, hi) if table.is_prime(n)]
+
+    def test_prime_table_offset(self):
+        expected = list(primes_in_range(10 ** 10, 10 ** 10 + 1000))
+        table = prime_table(10 ** 10, 10 ** 10 + 1000)
+        result = [n for n in range(10 ** 10, 10 ** 10 + 1000) if n in table]
+
+        assert expected == result
+        assert len(table.bits) == 1000 // 16 + 1
+
+    def test_prime_table_memory_budget(self):
+        try:
+            prime_table(0, 10 ** 10)
+            assert False
+        except ValueError as error:
+            assert 'primes_in_range' in str(error)
+
+    def test_prime_table_out_of_range(self):
+        try:
+            prime_table(10, 20).is_prime(5)
+            assert False
+        except ValueError:
+            pass
+
+    def test_returns_steps(self):
+        expected = (True, 13)
+        result = is_prime(18446744073709551557)
+
+        assert expected == result
@@ -1,44 +1,18 @@
 import math
+from instrumentation import instrumented
+from primality import is_prime
 
 
+# Small-prime gcd, then deterministic Miller-Rabin for 64-bit inputs and BPSW above that
+@instrumented(returns_steps=True)
 def fast_is_number_prime(n):
-    steps = 0
-
-    # Catch all the small prime numbers first
-    if n % 2 == 0:
-        return False, steps
-
-    if n % 3 == 0:
-        return False, steps
-
-    if n % 5 == 0:
-        return False, steps
-
-    if n % 7 == 0:
-        return False, steps
-
-    # Get the square root and use it as the upper bound for iteration
-    upper_bound = int(math.sqrt(n))
-    print("Upper bound {0}".format(upper_bound))
-
-    # Start iterating from the next small prime number : 11
-    i = 11
-    while i < upper_bound:
-        steps += 1
-
-        # Check if performing modulo on using i has 0 remainder,
-        if n % i == 0 or n % (i + 2) == 0:
-            return False
-
-        # By iterating +6 we are iterating most of the time on a prime number by starting from 11
-        i += 6
-
-    return True, steps
+    return is_prime(n)
 
 
+# Steps and timings go to instrumentation when it is enabled, see instrumentation.py
+@instrumented(returns_steps=True)
 def slow_is_number_prime(n):
     upper_bound = int(math.sqrt(n))
-    print("Upper bound {0}".format(upper_bound))
 
     i = 3
     steps = 0
@@ -48,7 +22,6 @@ def slow_is_number_prime(n):
 
     while i < upper_bound:
         steps += 1
-        print("SLOW: Steps: {0}".format(i))
 
         if n % i == 0:
             return False, steps
@@ -58,8 +31,31 @@ def slow_is_number_prime(n):
     return True, steps
 
 
-fast = fast_is_number_prime(54673257461630679457)
-slow = slow_is_number_prime(54673257461630679457)
+# Run with: python quick.py
+# The slow trial division of this 20-digit number takes ~3.7 * 10^9 steps, so it only runs when asked for
+def main(run_slow=False):
+    fast = fast_is_number_prime(54673257461630679457)
+    print("Fast: {0}".format(fast))
+
+    if run_slow:
+        slow = slow_is_number_prime(54673257461630679457)
+        print("Slow: {0}".format(slow))
+
+
+class TestClass:
+    def test_steps_feed_instrumentation(self):
+        from instrumentation import recording
+
+        with recording() as recorder:
+            fast = fast_is_number_prime(1000003)
+            slow = slow_is_number_prime(1000003)
+
+        assert (True, 13) == fast
+        assert (True, 499) == slow
+        assert 499 == recorder.steps['slow_is_number_prime'].total
+        assert 1 == recorder.counters['fast_is_number_prime.calls']
+
 
-print("Fast: {0}".format(fast))
-print("Slow: {0}".format(slow))
+if __name__ == "__main__":
+    import sys
+    main(run_slow="--slow" in sys.argv[1:])
@@ -1,35 +1,62 @@
-import pytest
-import sys
+from array import array
+from utxo_index import SortedUTXOIndex
+
+# Amounts can be floats in BTC, or integer satoshis held in an array('q') / NumPy int64 buffer.
+# Integer amounts keep every sum exact, e.g. 0.1 + 0.2 != 0.3 in floats but 10000000 + 20000000 == 30000000.
+SATOSHIS_PER_BTC = 100000000
+
+
+def to_satoshis(amount):
+    return round(amount * SATOSHIS_PER_BTC)
+
+
+def satoshi_array(amounts):
+    return array('q', (to_satoshis(amount) for amount in amounts))
+
+
+# Zero-copy int64 view over an existing buffer: array('q'), a NumPy int64 array, bytes from disk ...
+def satoshi_view(buffer):
+    view = memoryview(buffer)
+
+    if view.format != 'q':
+        view = view.cast('B').cast('q')
+
+    return view
+
 
 # Time: O(n^2)
 # Memory: O(1)
 def brute_force_solution(input_TXs, target):
-    current_lowest_value = 2 ** 256 - 2 ** 32 - 977
+    current_lowest_value = None
     lowest_possible_inputs = (0, 0)
 
     for i in range(len(input_TXs)):
         for j in range(i + 1, len(input_TXs)):
             output_values = input_TXs[i] + input_TXs[j]
 
-            if target <= output_values < current_lowest_value:
+            if target <= output_values and (current_lowest_value is None or output_values < current_lowest_value):
                 current_lowest_value = output_values
                 lowest_possible_inputs = (input_TXs[i], input_TXs[j])
 
     return lowest_possible_inputs
 
 
-# Time: O(n log n)
+# Time: O(n log n), O(n) when input_TXs is already a SortedUTXOIndex
 def sort_then_iterate(input_TXs, target):
 
     # Input transactions has only one unspent transaction
     if len(input_TXs) < 2 and input_TXs[0] >= target:
         return input_TXs[0]
 
-    # Sort the inputs using timsort - should be O(n log n)
-    input_TXs.sort()
+    # A persistent index is already sorted, scan it in place
+    if isinstance(input_TXs, SortedUTXOIndex):
+        return input_TXs.find_pair(target)
+
+    # Sort a copy of the inputs using timsort - should be O(n log n), the caller's list is left alone
+    input_TXs = sorted(input_TXs)
 
     last_found_inputs = (0, 0)
-    current_lowest_output = sys.maxsize
+    current_lowest_output = None
 
     low = 0
     high = len(input_TXs) - 1
@@ -38,7 +65,7 @@ def sort_then_iterate(input_TXs, target):
     while low != high:
         output_values = input_TXs[low] + input_TXs[high]
 
-        if target <= output_values < current_lowest_output:
+        if target <= output_values and (current_lowest_output is None or output_values < current_lowest_output):
             current_lowest_output = output_values
             last_found_inputs = (input_TXs[low], input_TXs[high])
 
@@ -77,6 +104,65 @@ class TestClass:
 
         assert expected == result
 
+    def test_to_satoshis(self):
+        expected = [50000000, 90000000, 2000, 30000000]
+        result = [to_satoshis(amount) for amount in [0.5, 0.9, 0.00002, 0.1 + 0.2]]
+
+        assert expected == result
+
+    def test_satoshi_view_is_zero_copy(self):
+        amounts = satoshi_array([2, 0.5])
+        view = satoshi_view(amounts)
+        amounts[0] = 1
+
+        assert [1, 50000000] == view.tolist()
+
+    def test_satoshi_view_of_raw_bytes(self):
+        expected = [5, 7]
+        buffer = bytearray(array('q', [5, 7]).tobytes())
+        result = satoshi_view(buffer).tolist()
+
+        assert expected == result
+
+    def test_brute_force_solution_satoshis(self):
+        expected = 50000000, 90000000
+        input_TXs = satoshi_view(satoshi_array([2, 0.5, 5, 3, 0.9]))
+        target = to_satoshis(0.71)
+        result = brute_force_solution(input_TXs, target)
+
+        assert expected == result
+
+    def test_sort_then_iterate_satoshis(self):
+        expected = 12300000, 23000000
+        input_TXs = satoshi_array([2, 0.5, 5, 3, 0.9, 10, 100, 93, 0.23, 0.005, 0.123, 0.8342, 0.00002, 0.002342, 7, 11])
+        target = to_satoshis(0.3)
+        result = sort_then_iterate(input_TXs, target)
+
+        assert expected == result
+
+    def test_sort_then_iterate_exact_with_satoshis(self):
+        # In floats 0.1 + 0.2 != 0.3, in satoshis the pair is an exact match
+        expected = 10000000, 20000000
+        input_TXs = satoshi_array([0.1, 0.2, 0.5])
+        target = to_satoshis(0.3)
+        result = sort_then_iterate(input_TXs, target)
+
+        assert expected == result
+
+    def test_sort_then_iterate_does_not_mutate_input(self):
+        expected = [2, 0.5, 5, 3, 0.9]
+        input_TXs = [2, 0.5, 5, 3, 0.9]
+        sort_then_iterate(input_TXs, 0.71)
+
+        assert expected == input_TXs
+
+    def test_sort_then_iterate_on_index(self):
+        expected = 0.5, 2
+        index = SortedUTXOIndex([2, 0.5, 5, 3, 0.9])
+        result = sort_then_iterate(index, 2.23)
+
+        assert expected == result
+
     def test_using_sort_then_iterate_algorithm_2(self):
         expected = 0.5, 2
         input_TXs = [2, 0.5, 5, 3, 0.9]
@@ -0,0 +1,181 @@
+from curve import SECP256K1
+from secp256k1 import decompress_point, batch_decompress_points
+
+# SEC1 public key serialization as bytes
+# Uncompressed: 04 || x || y   (65 bytes for secp256k1)
+# Compressed:   02 || x if y is even, 03 || x if y is odd   (33 bytes for secp256k1)
+# Coordinates are always written as fixed width big-endian integers (curve.coordinate_size bytes, 32 for
+# secp256k1), so leading zeros are kept. Every function takes an optional curve, see curve.py.
+
+COORDINATE_SIZE = SECP256K1.coordinate_size
+COMPRESSED_SIZE = 1 + COORDINATE_SIZE
+UNCOMPRESSED_SIZE = 1 + 2 * COORDINATE_SIZE
+
+
+def encoded_size(compressed, curve=SECP256K1):
+    return 1 + curve.coordinate_size if compressed else 1 + 2 * curve.coordinate_size
+
+
+def encode_point(point, compressed=True, curve=SECP256K1):
+    x, y = point
+    size = curve.coordinate_size
+
+    if compressed:
+        return (2 + (y & 1)).to_bytes(1, 'big') + x.to_bytes(size, 'big')
+
+    return b'\x04' + x.to_bytes(size, 'big') + y.to_bytes(size, 'big')
+
+
+# Writes one encoded point into a preallocated buffer, returns the offset just past it
+def encode_point_into(buffer, offset, point, compressed=True, curve=SECP256K1):
+    x, y = point
+    size = curve.coordinate_size
+    x_start = offset + 1
+    x_end = x_start + size
+
+    buffer[x_start:x_end] = x.to_bytes(size, 'big')
+
+    if compressed:
+        buffer[offset] = 2 + (y & 1)
+        return x_end
+
+    buffer[offset] = 4
+    buffer[x_end:x_end + size] = y.to_bytes(size, 'big')
+
+    return x_end + size
+
+
+def decode_point(data, curve=SECP256K1):
+    prefix = data[0]
+
+    if prefix == 4 and len(data) == encoded_size(False, curve):
+        middle = 1 + curve.coordinate_size
+        point = int.from_bytes(data[1:middle], 'big'), int.from_bytes(data[middle:], 'big')
+
+        # contains also rejects coordinates >= p
+        if not curve.contains(point):
+            raise ValueError("Point is not on the curve")
+
+        return point
+
+    if prefix in (2, 3) and len(data) == encoded_size(True, curve):
+        x = int.from_bytes(data[1:], 'big')
+
+        if x >= curve.p:
+            raise ValueError("x is not a field element")
+
+        return decompress_point(x, prefix & 1, curve)
+
+    raise ValueError("Not a SEC1 encoded public key")
+
+
+# Bulk encoding: every point is written into one buffer allocated up front, with a fixed stride
+def encode_points(points, compressed=True, curve=SECP256K1):
+    size = encoded_size(compressed, curve)
+    buffer = bytearray(size * len(points))
+    offset = 0
+
+    for point in points:
+        offset = encode_point_into(buffer, offset, point, compressed, curve)
+
+    return buffer
+
+
+def decode_points(buffer, compressed=True, curve=SECP256K1):
+    size = encoded_size(compressed, curve)
+    view = memoryview(buffer)
+
+    if len(view) % size != 0:
+        raise ValueError("Buffer length is not a multiple of {0}".format(size))
+
+    if not compressed:
+        return [decode_point(view[offset:offset + size], curve) for offset in range(0, len(view), size)]
+
+    compressed_points = []
+
+    for offset in range(0, len(view), size):
+        prefix = view[offset]
+        if prefix not in (2, 3):
+            raise ValueError("Not a compressed SEC1 public key at offset {0}".format(offset))
+
+        x = int.from_bytes(view[offset + 1:offset + size], 'big')
+        if x >= curve.p:
+            raise ValueError("x is not a field element at offset {0}".format(offset))
+
+        compressed_points.append((x, prefix & 1))
+
+    return batch_decompress_points(compressed_points, curve)
+
+
+class TestClass:
+    def test_encode_uncompressed(self):
+        expected = bytes.fromhex(
+            '045CBDF0646E5DB4EAA398F365F2EA7A0E3D419B7E0330E39CE92BDDEDCAC4F9BC'
+            '6AEBCA40BA255960A3178D6D861A54DBA813D0B813FDE7B5A5082628087264DA')
+        point = (0x5CBDF0646E5DB4EAA398F365F2EA7A0E3D419B7E0330E39CE92BDDEDCAC4F9BC,
+                 0x6AEBCA40BA255960A3178D6D861A54DBA813D0B813FDE7B5A5082628087264DA)
+        result = encode_point(point, compressed=False)
+
+        assert expected == result
+
+    def test_encode_compressed(self):
+        expected = bytes.fromhex('03A598A8030DA6D86C6BC7F2F5144EA549D28211EA58FAA70EBF4C1E665C1FE9B5')
+        point = (0xA598A8030DA6D86C6BC7F2F5144EA549D28211EA58FAA70EBF4C1E665C1FE9B5,
+                 14607169553442007236852410049041684566594265431374316230317606814245957553771)
+        result = encode_point(point)
+
+        assert expected == result
+
+    def test_encode_keeps_leading_zeros(self):
+        point = (0x1, 0x2)
+        result = encode_point(point, compressed=False)
+
+        assert len(result) == UNCOMPRESSED_SIZE
+        assert result[1:COMPRESSED_SIZE] == (1).to_bytes(32, 'big')
+
+    def test_decode_round_trip(self):
+        point = (0x5CBDF0646E5DB4EAA398F365F2EA7A0E3D419B7E0330E39CE92BDDEDCAC4F9BC,
+                 0x6AEBCA40BA255960A3178D6D861A54DBA813D0B813FDE7B5A5082628087264DA)
+
+        assert point == decode_point(encode_point(point))
+        assert point == decode_point(encode_point(point, compressed=False))
+
+    def test_decode_rejects_point_off_curve(self):
+        try:
+            decode_point(encode_point((1, 2), compressed=False))
+            assert False
+        except ValueError:
+            pass
+
+    def test_bulk_round_trip(self):
+        from secp256k1 import batch_multiply_generator
+        points = batch_multiply_generator([7, 123, 999 ** 3, 42424242])
+
+        for compressed in (True, False):
+            buffer = encode_points(points, compressed)
+            assert len(buffer) == len(points) * encoded_size(compressed)
+            assert points == decode_points(buffer, compressed)
+
+    def test_small_curve_round_trip(self):
+        from curve import TEST_CURVE_F211
+        from secp256k1 import multiply_generator
+        points = [multiply_generator(k, TEST_CURVE_F211) for k in [1, 2, 50, 198]]
+
+        for compressed in (True, False):
+            buffer = encode_points(points, compressed, TEST_CURVE_F211)
+
+            assert len(buffer) == len(points) * encoded_size(compressed, TEST_CURVE_F211)
+            assert points == decode_points(buffer, compressed, TEST_CURVE_F211)
+            assert points[2] == decode_point(encode_point(points[2], compressed, TEST_CURVE_F211), TEST_CURVE_F211)
+
+    def test_bulk_decode_rejects_unreduced_x(self):
+        from secp256k1 import P
+        # x = 1 is on the curve, P + 1 still fits in 32 bytes
+        data = b'\x02' + (P + 1).to_bytes(COORDINATE_SIZE, 'big')
+
+        for decode in (decode_point, decode_points):
+            try:
+                decode(data)
+                assert False
+            except ValueError as error:
+                assert 'field element' in str(error)
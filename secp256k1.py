@@ -0,0 +1,876 @@
+from curve import SECP256K1, GENERATOR_WINDOW_BITS
+from field import batch_inverse, sqrt_mod_prime
+
+# Native elliptic curve point engine, secp256k1 by default
+
+# Equation: y^2 = x^3 + 7
+# Prime Field (p) = 2^256 - 2^32 - 977
+# Order (n) = FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+# Every function takes an optional curve (see curve.py), any short Weierstrass curve y^2 = x^3 + ax + b works,
+# e.g. the small test curves in curve.py.
+
+# Points are passed around in two forms:
+# Affine (x, y) tuples - the same tuples generate_public_key has always returned, None is the point at infinity
+# Jacobian (X, Y, Z) tuples - x = X / Z^2, y = Y / Z^3, Z == 0 is the point at infinity
+# Jacobian coordinates let us add and double without a field inversion, we only invert once when going back to affine
+
+P = SECP256K1.p
+N = SECP256K1.n
+G = SECP256K1.g
+
+INFINITY = (0, 1, 0)
+
+# p = 3 (mod 4), so a square root of a is a^((p + 1) / 4)
+SQRT_EXPONENT = SECP256K1.sqrt_exponent
+
+# Fixed-base table: 8 bit windows, 32 windows cover a 256 bit scalar
+GENERATOR_WINDOWS = SECP256K1.generator_windows
+
+# Window width used for wNAF on arbitrary points
+WNAF_WIDTH = 5
+# G is fixed, so joint multiplications can afford a wider, cached table of its odd multiples
+GENERATOR_WNAF_WIDTH = 8
+# Window width of the constant-time fixed-window multiplication, table of 2^(w-1) odd multiples
+CONSTANT_TIME_WIDTH = 4
+# G's constant-time tables are built once, so they can be wider: 43 windows of 32 odd multiples for secp256k1
+CONSTANT_TIME_GENERATOR_WIDTH = 6
+
+
+# Converting between affine and Jacobian coordinates
+def to_jacobian(point):
+    if point is None:
+        return INFINITY
+
+    return point[0], point[1], 1
+
+
+def to_affine(point, curve=SECP256K1):
+    x, y, z = point
+
+    if z == 0:
+        return None
+
+    p = curve.p
+    z_inv = pow(z, -1, p)
+    z_inv_2 = z_inv * z_inv % p
+
+    return x * z_inv_2 % p, y * z_inv_2 * z_inv % p
+
+
+def batch_to_affine(points, curve=SECP256K1):
+    # One inversion for the whole batch, see field.batch_inverse
+    p = curve.p
+    z_inverses = batch_inverse([z for _, _, z in points], p)
+    affine_points = []
+
+    for (x, y, z), z_inv in zip(points, z_inverses):
+        if z == 0:
+            affine_points.append(None)
+            continue
+
+        z_inv_2 = z_inv * z_inv % p
+        affine_points.append((x * z_inv_2 % p, y * z_inv_2 * z_inv % p))
+
+    return affine_points
+
+
+# Point arithmetic in Jacobian coordinates
+def jacobian_double(point, curve=SECP256K1):
+    x, y, z = point
+
+    if z == 0 or y == 0:
+        return INFINITY
+
+    p = curve.p
+
+    if curve.a:
+        # dbl-2007-bl, M = 3X^2 + aZ^4
+        xx = x * x % p
+        yy = y * y % p
+        yyyy = yy * yy % p
+        zz = z * z % p
+        s = 2 * ((x + yy) ** 2 - xx - yyyy) % p
+        m = (3 * xx + curve.a * zz * zz) % p
+
+        x3 = (m * m - 2 * s) % p
+        y3 = (m * (s - x3) - 8 * yyyy) % p
+        z3 = ((y + z) ** 2 - yy - zz) % p
+
+        return x3, y3, z3
+
+    # dbl-2009-l (a = 0)
+    a = x * x % p
+    b = y * y % p
+    c = b * b % p
+    d = 2 * ((x + b) ** 2 - a - c) % p
+    e = 3 * a % p
+    f = e * e % p
+
+    x3 = (f - 2 * d) % p
+    y3 = (e * (d - x3) - 8 * c) % p
+    z3 = 2 * y * z % p
+
+    return x3, y3, z3
+
+
+# Additions don't depend on a, only doubling does
+def jacobian_add(p1, p2, curve=SECP256K1):
+    x1, y1, z1 = p1
+    x2, y2, z2 = p2
+
+    if z1 == 0:
+        return p2
+
+    if z2 == 0:
+        return p1
+
+    p = curve.p
+
+    # add-2007-bl
+    z1z1 = z1 * z1 % p
+    z2z2 = z2 * z2 % p
+    u1 = x1 * z2z2 % p
+    u2 = x2 * z1z1 % p
+    s1 = y1 * z2 * z2z2 % p
+    s2 = y2 * z1 * z1z1 % p
+    h = (u2 - u1) % p
+    r = 2 * (s2 - s1) % p
+
+    if h == 0:
+        if r == 0:
+            return jacobian_double(p1, curve)
+
+        return INFINITY
+
+    i = 4 * h * h % p
+    j = h * i % p
+    v = u1 * i % p
+
+    x3 = (r * r - j - 2 * v) % p
+    y3 = (r * (v - x3) - 2 * s1 * j) % p
+    z3 = ((z1 + z2) ** 2 - z1z1 - z2z2) * h % p
+
+    return x3, y3, z3
+
+
+# Mixed addition: Jacobian + affine, cheaper than a full Jacobian addition
+def jacobian_add_affine(p1, p2, curve=SECP256K1):
+    x1, y1, z1 = p1
+    x2, y2 = p2
+
+    if z1 == 0:
+        return x2, y2, 1
+
+    p = curve.p
+
+    # madd-2007-bl
+    z1z1 = z1 * z1 % p
+    u2 = x2 * z1z1 % p
+    s2 = y2 * z1 * z1z1 % p
+    h = (u2 - x1) % p
+    r = 2 * (s2 - y1) % p
+
+    if h == 0:
+        if r == 0:
+            return jacobian_double(p1, curve)
+
+        return INFINITY
+
+    hh = h * h % p
+    i = 4 * hh % p
+    j = h * i % p
+    v = x1 * i % p
+
+    x3 = (r * r - j - 2 * v) % p
+    y3 = (r * (v - x3) - 2 * y1 * j) % p
+    z3 = ((z1 + h) ** 2 - z1z1 - hh) % p
+
+    return x3, y3, z3
+
+
+# Decompression: recover y from x and the parity bit of a compressed key
+def sqrt_mod_p(a, curve=SECP256K1):
+    p = curve.p
+
+    if curve.sqrt_exponent is None:
+        return sqrt_mod_prime(a, p)
+
+    root = pow(a, curve.sqrt_exponent, p)
+
+    if root * root % p != a % p:
+        return None
+
+    return root
+
+
+def decompress_point(x, is_odd, curve=SECP256K1):
+    y = sqrt_mod_p(curve.equation(x), curve)
+
+    if y is None:
+        raise ValueError("x is not on the curve: {0}".format(hex(x)))
+
+    if (y & 1) != is_odd:
+        y = (curve.p - y) % curve.p
+
+    return x, y
+
+
+def batch_decompress_points(compressed_points, curve=SECP256K1):
+    if curve.sqrt_exponent is None:
+        return [decompress_point(x, is_odd, curve) for x, is_odd in compressed_points]
+
+    p = curve.p
+    a = curve.a
+    b = curve.b
+    exponent = curve.sqrt_exponent
+    points = []
+
+    for x, is_odd in compressed_points:
+        alpha = (x * x * x + a * x + b) % p
+        y = pow(alpha, exponent, p)
+
+        if y * y % p != alpha:
+            raise ValueError("x is not on the curve: {0}".format(hex(x)))
+
+        if (y & 1) != is_odd:
+            y = (p - y) % p
+
+        points.append((x, y))
+
+    return points
+
+
+def negate(point, curve=SECP256K1):
+    if point is None:
+        return None
+
+    return point[0], -point[1] % curve.p
+
+
+# Fixed-base multiplication for the generator
+# The table holds d * 2^(8w) * G for every window w and digit d, flattened as table[w * 256 + d].
+# k * G is then at most 32 mixed additions (for secp256k1) and no doublings.
+def build_generator_table(curve=SECP256K1):
+    window_size = 1 << GENERATOR_WINDOW_BITS
+    table = []
+    base = to_jacobian(curve.g)
+
+    for _ in range(curve.generator_windows):
+        table.append(INFINITY)
+        multiple = INFINITY
+
+        for _ in range(1, window_size):
+            multiple = jacobian_add(multiple, base, curve)
+            table.append(multiple)
+
+        for _ in range(GENERATOR_WINDOW_BITS):
+            base = jacobian_double(base, curve)
+
+    return batch_to_affine(table, curve)
+
+
+# Built once per curve and kept on the Curve
+def get_generator_table(curve=SECP256K1):
+    if curve.generator_table is None:
+        curve.generator_table = build_generator_table(curve)
+
+    return curve.generator_table
+
+
+def multiply_generator_jacobian(k, curve=SECP256K1):
+    table = get_generator_table(curve)
+    mask = (1 << GENERATOR_WINDOW_BITS) - 1
+    k = k % curve.n
+    result = INFINITY
+    offset = 0
+
+    while k:
+        digit = k & mask
+        if digit:
+            result = jacobian_add_affine(result, table[offset + digit], curve)
+
+        k >>= GENERATOR_WINDOW_BITS
+        offset += mask + 1
+
+    return result
+
+
+def multiply_generator(k, curve=SECP256K1):
+    return to_affine(multiply_generator_jacobian(k, curve), curve)
+
+
+# Batch mode: keep every result in Jacobian form and normalize the whole batch with one inversion
+def batch_multiply_generator(scalars, curve=SECP256K1):
+    return batch_to_affine([multiply_generator_jacobian(k, curve) for k in scalars], curve)
+
+
+# Variable-base multiplication using the width-w non-adjacent form
+# Every non-zero digit is odd and followed by at least w - 1 zeros,
+# so only the odd multiples P, 3P ... (2^(w-1) - 1)P need precomputing.
+def wnaf(k, width=WNAF_WIDTH):
+    window = 1 << width
+    half_window = window >> 1
+    digits = []
+
+    while k:
+        if k & 1:
+            digit = k & (window - 1)
+            if digit >= half_window:
+                digit -= window
+            k -= digit
+        else:
+            digit = 0
+
+        digits.append(digit)
+        k >>= 1
+
+    return digits
+
+
+def odd_multiples(point, width=WNAF_WIDTH, curve=SECP256K1):
+    count = 1 << (width - 2)
+    doubled = jacobian_double(to_jacobian(point), curve)
+    current = to_jacobian(point)
+    multiples = [current]
+
+    for _ in range(count - 1):
+        current = jacobian_add(current, doubled, curve)
+        multiples.append(current)
+
+    return batch_to_affine(multiples, curve)
+
+
+# GLV endomorphism (secp256k1 and any Curve with beta, lam and glv_basis set)
+# phi(x, y) = (beta * x, y) is lam * (x, y) for one field multiplication. Splitting k = k1 + k2 * lam (mod n)
+# with k1, k2 about half the bit length of n turns k * P into k1 * P + k2 * phi(P): two half-length wNAF
+# strings sharing one chain of ~128 doublings instead of 256. The odd multiples of phi(P) are phi of the odd
+# multiples of P, so the extra table costs one multiplication per entry.
+# Split with the short lattice basis (a1, b1), (a2, b2) from curve.glv_basis, Guide to ECC algorithm 3.74:
+#   c1 = round(b2 * k / n), c2 = round(-b1 * k / n), k1 = k - c1 * a1 - c2 * a2, k2 = -c1 * b1 - c2 * b2
+# k1 and k2 can be negative, the caller multiplies by |k| and swaps in the negated table.
+def glv_split(k, curve=SECP256K1):
+    n = curve.n
+    (a1, b1), (a2, b2) = curve.glv_basis
+    half_n = n >> 1
+    c1 = (b2 * k + half_n) // n
+    c2 = (-b1 * k + half_n) // n
+
+    return k - c1 * a1 - c2 * a2, -c1 * b1 - c2 * b2
+
+
+def endomorphism(point, curve=SECP256K1):
+    if point is None:
+        return None
+
+    return curve.beta * point[0] % curve.p, point[1]
+
+
+# (|k|, multiples, negated) for a signed half of a GLV split, with the tables swapped when the half is negative
+def signed_term(k, multiples, negated):
+    if k < 0:
+        return -k, negated, multiples
+
+    return k, multiples, negated
+
+
+# Shared doubling chain over several wNAF digit strings, terms are (digits, multiples, negated).
+# Used by both scalar_multiply_jacobian (GLV) and double_multiply_jacobian (Strauss-Shamir).
+def interleaved_multiply_jacobian(terms, curve=SECP256K1):
+    terms = [term for term in terms if term[0]]
+    length = max((len(digits) for digits, _, _ in terms), default=0)
+    terms = [(digits + [0] * (length - len(digits)), multiples, negated) for digits, multiples, negated in terms]
+    result = INFINITY
+
+    for i in range(length - 1, -1, -1):
+        result = jacobian_double(result, curve)
+
+        for digits, multiples, negated in terms:
+            digit = digits[i]
+            if digit > 0:
+                result = jacobian_add_affine(result, multiples[digit >> 1], curve)
+            elif digit < 0:
+                result = jacobian_add_affine(result, negated[-digit >> 1], curve)
+
+    return result
+
+
+def scalar_multiply_jacobian(k, point, width=WNAF_WIDTH, curve=SECP256K1, use_endomorphism=True):
+    k = k % curve.n
+
+    if point is None or k == 0:
+        return INFINITY
+
+    multiples = odd_multiples(point, width, curve)
+    negated = [negate(multiple, curve) for multiple in multiples]
+
+    if use_endomorphism and curve.beta is not None:
+        k1, k2 = glv_split(k, curve)
+        phi_multiples = [endomorphism(multiple, curve) for multiple in multiples]
+        phi_negated = [endomorphism(multiple, curve) for multiple in negated]
+        terms = [signed_term(k1, multiples, negated), signed_term(k2, phi_multiples, phi_negated)]
+
+        return interleaved_multiply_jacobian([(wnaf(scalar, width), table, negated_table)
+                                              for scalar, table, negated_table in terms], curve)
+
+    result = INFINITY
+
+    for digit in reversed(wnaf(k, width)):
+        result = jacobian_double(result, curve)
+
+        if digit > 0:
+            result = jacobian_add_affine(result, multiples[digit >> 1], curve)
+        elif digit < 0:
+            result = jacobian_add_affine(result, negated[-digit >> 1], curve)
+
+    return result
+
+
+def scalar_multiply(k, point, width=WNAF_WIDTH, curve=SECP256K1, use_endomorphism=True):
+    return to_affine(scalar_multiply_jacobian(k, point, width, curve, use_endomorphism), curve)
+
+
+# Constant-time mode for secret scalars
+# The operation sequence doesn't depend on the scalar: k is made odd (k or k + n) and recoded into a fixed
+# number of odd signed digits +-1, +-3 ... +-(2^w - 1) (Joye-Tunstall regular recoding), so every window is
+# exactly w doublings and one addition, with no zero digits to skip. Table entries are read with a masked
+# scan over the whole table and negated with a mask instead of branching on the digit.
+# CPython's big integers are not constant-time themselves, so this removes the scalar-dependent control flow
+# and table access pattern, not every timing difference. python bench.py constant-time measures what is left.
+# It also costs throughput, every window pays for an addition and a full table scan whatever the digits are.
+# Measured with python bench.py constant-time on secp256k1, per multiplication:
+#   k * P   ~3.4 ms constant time vs ~1.8 ms variable time (wNAF + GLV), about 1.9x slower
+#   k * G   ~0.8-1.0 ms constant time vs 110-410 us for the variable-time fixed-base table, 2.5-8x slower
+# Use the constant-time functions for secret scalars only, the variable-time ones for public data.
+def regular_recoding(k, width, windows):
+    digits = []
+    modulus = 1 << (width + 1)
+    offset = 1 << width
+
+    for _ in range(windows - 1):
+        digit = (k & (modulus - 1)) - offset
+        k = (k - digit) >> width
+        digits.append(digit)
+
+    digits.append(k)
+
+    return digits
+
+
+def select_point(table, index):
+    x = 0
+    y = 0
+
+    for i, (entry_x, entry_y) in enumerate(table):
+        mask = -(i == index)
+        x |= entry_x & mask
+        y |= entry_y & mask
+
+    return x, y
+
+
+def scalar_multiply_constant_time_jacobian(k, point, curve=SECP256K1, width=CONSTANT_TIME_WIDTH):
+    n = curve.n
+    p = curve.p
+    k %= n
+
+    if point is None or k == 0:
+        return INFINITY
+
+    # k + n * (1 - k mod 2) is odd and gives the same point, without branching on the parity
+    k += n * (1 - (k & 1))
+    # Same cap as build_generator_constant_time_table: with 2^width >= n the table would hold the point at infinity
+    width = min(width, n.bit_length() - 1)
+    windows = -(-(n.bit_length() + 1) // width)
+    table = odd_multiples(point, width + 1, curve)
+    digits = regular_recoding(k, width, windows)
+
+    x, y = select_point(table, digits[-1] >> 1)
+    result = (x, y, 1)
+
+    for digit in reversed(digits[:-1]):
+        for _ in range(width):
+            result = jacobian_double(result, curve)
+
+        negative = digit >> (width + 1) & 1
+        magnitude = (digit ^ -negative) + negative
+        x, y = select_point(table, magnitude >> 1)
+        mask = -negative
+        y ^= (y ^ (p - y)) & mask
+        result = jacobian_add_affine(result, (x, y), curve)
+
+    return result
+
+
+def scalar_multiply_constant_time(k, point, curve=SECP256K1, width=CONSTANT_TIME_WIDTH):
+    return to_affine(scalar_multiply_constant_time_jacobian(k, point, curve, width), curve)
+
+
+# Constant-time fixed-base for G: every window w gets its own table of odd multiples d * 2^(width * w) * G,
+# d = 1, 3 ... 2^width - 1, so each regular-recoded digit is one masked select and one mixed addition,
+# with no doublings at all. The width is capped so 2^width < n, otherwise a small curve's table would hold
+# the point at infinity.
+def build_generator_constant_time_table(curve=SECP256K1, width=CONSTANT_TIME_GENERATOR_WIDTH):
+    width = min(width, curve.n.bit_length() - 1)
+    windows = -(-(curve.n.bit_length() + 1) // width)
+    base = to_jacobian(curve.g)
+    multiples = []
+
+    for _ in range(windows):
+        doubled = jacobian_double(base, curve)
+        current = base
+
+        for _ in range(1 << (width - 1)):
+            multiples.append(current)
+            current = jacobian_add(current, doubled, curve)
+
+        for _ in range(width):
+            base = jacobian_double(base, curve)
+
+    multiples = batch_to_affine(multiples, curve)
+    size = 1 << (width - 1)
+
+    return width, [multiples[i:i + size] for i in range(0, len(multiples), size)]
+
+
+# Built once per curve and kept on the Curve, (width, tables)
+def get_generator_constant_time_table(curve=SECP256K1):
+    if curve.generator_constant_time_table is None:
+        curve.generator_constant_time_table = build_generator_constant_time_table(curve)
+
+    return curve.generator_constant_time_table
+
+
+def multiply_generator_constant_time_jacobian(k, curve=SECP256K1):
+    n = curve.n
+    p = curve.p
+    k %= n
+
+    if k == 0:
+        return INFINITY
+
+    k += n * (1 - (k & 1))
+    width, tables = get_generator_constant_time_table(curve)
+    digits = regular_recoding(k, width, len(tables))
+
+    x, y = select_point(tables[-1], digits[-1] >> 1)
+    result = (x, y, 1)
+
+    for table, digit in zip(tables, digits[:-1]):
+        negative = digit >> (width + 1) & 1
+        magnitude = (digit ^ -negative) + negative
+        x, y = select_point(table, magnitude >> 1)
+        mask = -negative
+        y ^= (y ^ (p - y)) & mask
+        result = jacobian_add_affine(result, (x, y), curve)
+
+    return result
+
+
+def multiply_generator_constant_time(k, curve=SECP256K1):
+    return to_affine(multiply_generator_constant_time_jacobian(k, curve), curve)
+
+
+# Odd multiples of G and their negations for double_multiply, built once per curve and kept on the Curve.
+# With the endomorphism the tables for phi(G) are appended, (multiples, negated, phi_multiples, phi_negated).
+def get_generator_odd_multiples(curve=SECP256K1):
+    if curve.generator_odd_multiples is None:
+        multiples = odd_multiples(curve.g, GENERATOR_WNAF_WIDTH, curve)
+        negated = [negate(multiple, curve) for multiple in multiples]
+        curve.generator_odd_multiples = multiples, negated
+
+        if curve.beta is not None:
+            curve.generator_odd_multiples += ([endomorphism(multiple, curve) for multiple in multiples],
+                                              [endomorphism(multiple, curve) for multiple in negated])
+
+    return curve.generator_odd_multiples
+
+
+# Strauss-Shamir: u1 * G + u2 * Q with a single shared chain of doublings,
+# adding from both wNAF digit strings at each step, instead of two separate multiplications and an addition.
+# With the endomorphism both scalars are split, four ~128 bit strings over G, phi(G), Q and phi(Q).
+def double_multiply_jacobian(u1, u2, point, curve=SECP256K1, use_endomorphism=True):
+    u1 %= curve.n
+    u2 = u2 % curve.n if point is not None else 0
+    glv = use_endomorphism and curve.beta is not None
+
+    g_tables = get_generator_odd_multiples(curve)
+    g_terms = [(u1,) + g_tables[:2]]
+    q_terms = []
+
+    if u2:
+        q_multiples = odd_multiples(point, WNAF_WIDTH, curve)
+        q_negated = [negate(multiple, curve) for multiple in q_multiples]
+        q_terms = [(u2, q_multiples, q_negated)]
+
+    if glv:
+        k1, k2 = glv_split(u1, curve)
+        g_terms = [signed_term(k1, *g_tables[:2]), signed_term(k2, *g_tables[2:])]
+
+        if u2:
+            k1, k2 = glv_split(u2, curve)
+            q_terms = [signed_term(k1, q_multiples, q_negated),
+                       signed_term(k2, [endomorphism(multiple, curve) for multiple in q_multiples],
+                                   [endomorphism(multiple, curve) for multiple in q_negated])]
+
+    terms = [(wnaf(k, GENERATOR_WNAF_WIDTH), multiples, negated) for k, multiples, negated in g_terms]
+    terms += [(wnaf(k, WNAF_WIDTH), multiples, negated) for k, multiples, negated in q_terms]
+
+    return interleaved_multiply_jacobian(terms, curve)
+
+
+def double_multiply(u1, u2, point, curve=SECP256K1, use_endomorphism=True):
+    return to_affine(double_multiply_jacobian(u1, u2, point, curve, use_endomorphism), curve)
+
+
+def point_add(p1, p2, curve=SECP256K1):
+    return to_affine(jacobian_add(to_jacobian(p1), to_jacobian(p2), curve), curve)
+
+
+class TestClass:
+    def test_multiply_generator_by_one(self):
+        expected = G
+        result = multiply_generator(1)
+
+        assert expected == result
+
+    def test_multiply_generator(self):
+        expected = (0x5CBDF0646E5DB4EAA398F365F2EA7A0E3D419B7E0330E39CE92BDDEDCAC4F9BC,
+                    0x6AEBCA40BA255960A3178D6D861A54DBA813D0B813FDE7B5A5082628087264DA)
+        result = multiply_generator(7)
+
+        assert expected == result
+
+    def test_multiply_generator_by_order(self):
+        expected = None
+        result = multiply_generator(N)
+
+        assert expected == result
+
+    def test_multiply_generator_by_order_minus_one(self):
+        expected = negate(G)
+        result = multiply_generator(N - 1)
+
+        assert expected == result
+
+    def test_batch_inverse(self):
+        values = [3, 0, 7, P - 1]
+        expected = [pow(3, -1, P), 0, pow(7, -1, P), P - 1]
+        result = batch_inverse(values, P)
+
+        assert expected == result
+
+    def test_batch_multiply_generator(self):
+        scalars = [7, 1485, 0, 2 ** 128, 2 ** 240 + 2 ** 31]
+        expected = [multiply_generator(k) for k in scalars]
+        result = batch_multiply_generator(scalars)
+
+        assert expected == result
+
+    def test_decompress_point(self):
+        for k in [1, 7, 123, 1485, 2 ** 128]:
+            x, y = multiply_generator(k)
+            assert (x, y) == decompress_point(x, y & 1)
+
+    def test_decompress_point_not_on_curve(self):
+        # x = 5 has no y on the curve, 5^3 + 7 is not a square mod p
+        assert sqrt_mod_p(5 ** 3 + 7) is None
+
+        try:
+            decompress_point(5, 0)
+            assert False
+        except ValueError:
+            pass
+
+    def test_batch_decompress_points(self):
+        expected = [multiply_generator(k) for k in [7, 123, 42424242]]
+        compressed = [(x, y & 1) for x, y in expected]
+        result = batch_decompress_points(compressed)
+
+        assert expected == result
+
+    def test_wnaf_reconstructs_scalar(self):
+        k = 2 ** 240 + 2 ** 31 + 12345
+        digits = wnaf(k)
+        result = sum(digit << i for i, digit in enumerate(digits))
+
+        assert k == result
+
+    def test_scalar_multiply_matches_generator_table(self):
+        for k in [1, 2, 7, 1485, 2 ** 128, 2 ** 240 + 2 ** 31, N - 2]:
+            assert multiply_generator(k) == scalar_multiply(k, G)
+
+    def test_scalar_multiply_arbitrary_point(self):
+        point = multiply_generator(1485)
+        expected = multiply_generator(1485 * 999 % N)
+        result = scalar_multiply(999, point)
+
+        assert expected == result
+
+    def test_point_add(self):
+        expected = multiply_generator(3)
+        result = point_add(G, multiply_generator(2))
+
+        assert expected == result
+
+    def test_point_add_inverse_is_infinity(self):
+        expected = None
+        result = point_add(G, negate(G))
+
+        assert expected == result
+
+    def test_point_add_doubling(self):
+        expected = multiply_generator(2)
+        result = point_add(G, G)
+
+        assert expected == result
+
+    # Small curves through the same code, checked against the textbook affine formulas
+    def affine_multiply(self, k, point, curve):
+        p = curve.p
+        result = None
+
+        for _ in range(k):
+            if result is None:
+                result = point
+            elif result[0] == point[0] and (result[1] + point[1]) % p == 0:
+                result = None
+            else:
+                if result == point:
+                    s = (3 * point[0] ** 2 + curve.a) * pow(2 * point[1], -1, p) % p
+                else:
+                    s = (point[1] - result[1]) * pow(point[0] - result[0], -1, p) % p
+                x3 = (s * s - result[0] - point[0]) % p
+                result = x3, (s * (result[0] - x3) - result[1]) % p
+
+        return result
+
+    def test_small_curves(self):
+        from curve import TEST_CURVE_F223, TEST_CURVE_F211, TEST_CURVE_F17
+
+        for curve in [TEST_CURVE_F223, TEST_CURVE_F211, TEST_CURVE_F17]:
+            for k in range(1, curve.n + 1):
+                expected = self.affine_multiply(k, curve.g, curve)
+
+                assert expected == multiply_generator(k, curve)
+                assert expected == scalar_multiply(k, curve.g, curve=curve)
+                assert curve.contains(expected)
+
+    def test_small_curve_doubling_with_a(self):
+        from curve import TEST_CURVE_F17
+        expected = (6, 3)
+        result = point_add((5, 1), (5, 1), TEST_CURVE_F17)
+
+        assert expected == result
+
+    def test_small_curve_decompression(self):
+        from curve import TEST_CURVE_F211, TEST_CURVE_F17
+
+        for curve in [TEST_CURVE_F211, TEST_CURVE_F17]:
+            points = [multiply_generator(k, curve) for k in range(1, curve.n)]
+            compressed = [(x, y & 1) for x, y in points]
+
+            assert points == batch_decompress_points(compressed, curve)
+            assert points[0] == decompress_point(points[0][0], points[0][1] & 1, curve)
+
+    def test_double_multiply(self):
+        point = multiply_generator(1485)
+
+        for u1, u2 in [(7, 999), (N - 1, 2 ** 255), (0, 5), (5, 0), (2 ** 200 + 3, N - 2)]:
+            expected = point_add(multiply_generator(u1), scalar_multiply(u2, point))
+
+            assert expected == double_multiply(u1, u2, point)
+
+        assert multiply_generator(12) == double_multiply(12, 7, None)
+        assert None is double_multiply(1485, N - 1, point)
+
+    def test_glv_split(self):
+        import random
+        rng = random.Random(25)
+
+        for k in [0, 1, SECP256K1.lam, N - 1, 2 ** 255] + [rng.randrange(N) for _ in range(200)]:
+            k1, k2 = glv_split(k)
+
+            assert k % N == (k1 + k2 * SECP256K1.lam) % N
+            assert abs(k1) < 2 ** 129 and abs(k2) < 2 ** 129
+
+    def test_endomorphism_is_multiplication_by_lambda(self):
+        point = multiply_generator(1485)
+
+        assert multiply_generator(SECP256K1.lam) == endomorphism(G)
+        assert scalar_multiply(SECP256K1.lam, point, use_endomorphism=False) == endomorphism(point)
+        assert None is endomorphism(None)
+
+    def test_glv_matches_plain_path(self):
+        import random
+        rng = random.Random(26)
+        point = multiply_generator(rng.randrange(1, N))
+
+        for k in [1, 2, 999, SECP256K1.lam, N - 1] + [rng.randrange(N) for _ in range(20)]:
+            expected = scalar_multiply(k, point, use_endomorphism=False)
+
+            assert expected == scalar_multiply(k, point)
+
+        for _ in range(10):
+            u1, u2 = rng.randrange(N), rng.randrange(N)
+            expected = double_multiply(u1, u2, point, use_endomorphism=False)
+
+            assert expected == double_multiply(u1, u2, point)
+
+    def test_double_multiply_small_curves(self):
+        from curve import TEST_CURVE_F211, TEST_CURVE_F17
+
+        for curve in [TEST_CURVE_F211, TEST_CURVE_F17]:
+            point = multiply_generator(5, curve)
+
+            for u1 in range(curve.n):
+                expected = multiply_generator(u1 + 5 * 3, curve)
+
+                assert expected == double_multiply(u1, 3, point, curve)
+
+    def test_regular_recoding(self):
+        for k in [1, 3, 2 ** 255 + 1, N + 2, 2 * N - 1]:
+            digits = regular_recoding(k, 4, 65)
+
+            assert k == sum(digit << (4 * i) for i, digit in enumerate(digits))
+            assert all(digit % 2 == 1 and abs(digit) < 16 for digit in digits)
+
+    def test_select_point(self):
+        table = [(1, 2), (3, 4), (5, 6)]
+
+        assert (3, 4) == select_point(table, 1)
+        assert (5, 6) == select_point(table, 2)
+
+    def test_scalar_multiply_constant_time(self):
+        point = multiply_generator(1485)
+
+        for k in [1, 2, 7, 2 ** 128, 2 ** 255 + 2 ** 31, N - 1, N - 2, 0, N]:
+            assert scalar_multiply(k, point) == scalar_multiply_constant_time(k, point)
+            assert multiply_generator(k) == multiply_generator_constant_time(k)
+
+    def test_scalar_multiply_constant_time_small_curves(self):
+        from curve import TEST_CURVE_F223, TEST_CURVE_F211, TEST_CURVE_F17
+
+        for curve in [TEST_CURVE_F223, TEST_CURVE_F211, TEST_CURVE_F17]:
+            for k in range(curve.n + 1):
+                assert multiply_generator(k, curve) == multiply_generator_constant_time(k, curve)
+                assert multiply_generator(k, curve) == scalar_multiply_constant_time(k, curve.g, curve)
+
+            point = multiply_generator(3, curve)
+            for k in range(curve.n + 1):
+                assert scalar_multiply(k, point, curve=curve) == scalar_multiply_constant_time(k, point, curve)
+
+    def test_generator_constant_time_table(self):
+        from curve import TEST_CURVE_F17
+        width, tables = get_generator_constant_time_table()
+
+        assert SECP256K1.generator_constant_time_table is get_generator_constant_time_table()
+        assert (CONSTANT_TIME_GENERATOR_WIDTH, 43) == (width, len(tables))
+        assert [multiply_generator(d << (width * 3)) for d in range(1, 1 << width, 2)] == tables[3]
+        assert 4 == get_generator_constant_time_table(TEST_CURVE_F17)[0]
+
+    def test_generator_table_is_per_curve(self):
+        from curve import TEST_CURVE_F211
+
+        assert get_generator_table(TEST_CURVE_F211) is TEST_CURVE_F211.generator_table
+        assert get_generator_table(TEST_CURVE_F211) is not get_generator_table()
@@ -0,0 +1,310 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+from curve import SECP256K1, GENERATOR_WINDOW_BITS
+from secp256k1 import build_generator_table
+
+# On-disk generator table cache
+# Building the secp256k1 fixed-base table takes ~0.2s, which a short-lived worker would pay on every start.
+# The table is written once to a flat binary file and every process memory-maps it read-only,
+# so workers share the same page cache copy instead of each building and holding their own.
+
+# File layout, all integers big-endian:
+#   header  magic, format version, window bits, window count, coordinate size,
+#           sha256 of the curve parameters, sha256 of the body
+#   body    one entry per table slot: x || y, coordinate size bytes each. The point at infinity is all zeros,
+#           which is unambiguous for any curve with b != 0 since (0, 0) is then not on the curve.
+
+# Rebuild with: python table_cache.py rebuild [path]
+# Check with:   python table_cache.py verify [path]
+
+MAGIC = b'ECCGTAB\x00'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>8sIIII32s32s')
+
+
+def curve_digest(curve):
+    parameters = (curve.p, curve.a, curve.b, curve.n, curve.g[0], curve.g[1])
+
+    return hashlib.sha256(repr(parameters).encode()).digest()
+
+
+def default_table_path(curve=SECP256K1):
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+    return os.path.join(cache_home, 'ecc-maths', 'generator-{0}-v{1}.bin'.format(curve.name, FORMAT_VERSION))
+
+
+def encode_table(table, curve=SECP256K1):
+    size = curve.coordinate_size
+    body = bytearray(2 * size * len(table))
+    offset = 0
+
+    for point in table:
+        if point is not None:
+            body[offset:offset + size] = point[0].to_bytes(size, 'big')
+            body[offset + size:offset + 2 * size] = point[1].to_bytes(size, 'big')
+
+        offset += 2 * size
+
+    return body
+
+
+# Written to a temporary file and renamed into place, so readers never see a half-written table
+def write_generator_table(path=None, curve=SECP256K1):
+    path = path or default_table_path(curve)
+    body = encode_table(build_generator_table(curve), curve)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, GENERATOR_WINDOW_BITS, curve.generator_windows,
+                         curve.coordinate_size, curve_digest(curve), hashlib.sha256(body).digest())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary_path = '{0}.{1}.tmp'.format(path, os.getpid())
+
+    with open(temporary_path, 'wb') as table_file:
+        table_file.write(header)
+        table_file.write(body)
+
+    os.replace(temporary_path, path)
+
+    return path
+
+
+# Read-only view over a mapped table file, indexed like the list from build_generator_table (table[w * 256 + d])
+# Entries are decoded on access, nothing is copied out of the mapping up front.
+class MappedGeneratorTable:
+    def __init__(self, path, curve=SECP256K1, verify=True):
+        with open(path, 'rb') as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._size = self._check_header(curve, verify)
+        except ValueError:
+            self._map.close()
+            raise
+
+        self.path = path
+        self._entry_size = 2 * self._size
+        self._length = curve.generator_windows << GENERATOR_WINDOW_BITS
+
+    def _check_header(self, curve, verify):
+        if len(self._map) < HEADER.size:
+            raise ValueError("Generator table file is truncated")
+
+        magic, version, window_bits, windows, size, digest, body_digest = HEADER.unpack_from(self._map)
+
+        if magic != MAGIC:
+            raise ValueError("Not a generator table file")
+
+        if version != FORMAT_VERSION:
+            raise ValueError("Generator table format version {0}, expected {1}".format(version, FORMAT_VERSION))
+
+        if (window_bits, windows, size) != (GENERATOR_WINDOW_BITS, curve.generator_windows, curve.coordinate_size):
+            raise ValueError("Generator table layout does not match this build")
+
+        if digest != curve_digest(curve):
+            raise ValueError("Generator table was built for a different curve")
+
+        body_size = (windows << window_bits) * 2 * size
+        if len(self._map) != HEADER.size + body_size:
+            raise ValueError("Generator table file is truncated")
+
+        if verify:
+            with memoryview(self._map) as view:
+                checksum = hashlib.sha256(view[HEADER.size:]).digest()
+
+            if checksum != body_digest:
+                raise ValueError("Generator table checksum mismatch")
+
+        return size
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._length:
+            raise IndexError("Generator table index out of range")
+
+        size = self._size
+        offset = HEADER.size + index * self._entry_size
+        x = int.from_bytes(self._map[offset:offset + size], 'big')
+        y = int.from_bytes(self._map[offset + size:offset + 2 * size], 'big')
+
+        if x == 0 and y == 0:
+            return None
+
+        return x, y
+
+    def close(self):
+        self._map.close()
+
+
+def load_generator_table(path=None, curve=SECP256K1, verify=True):
+    return MappedGeneratorTable(path or default_table_path(curve), curve, verify)
+
+
+# Check the cached file and rebuild it if it is missing, stale or corrupt, without installing it
+def ensure_generator_table(path=None, curve=SECP256K1):
+    path = path or default_table_path(curve)
+
+    try:
+        load_generator_table(path, curve).close()
+    except (OSError, ValueError):
+        write_generator_table(path, curve)
+
+    return path
+
+
+# Map the cached table and make the engine use it (secp256k1.get_generator_table returns curve.generator_table).
+# A missing, stale or corrupt file is rebuilt first when rebuild is True.
+# Also usable as a process pool initializer, see key_pool.derive_public_keys.
+def install_generator_table(path=None, curve=SECP256K1, rebuild=True):
+    path = path or default_table_path(curve)
+
+    try:
+        table = load_generator_table(path, curve)
+    except (OSError, ValueError):
+        if not rebuild:
+            raise
+
+        write_generator_table(path, curve)
+        table = load_generator_table(path, curve)
+
+    curve.generator_table = table
+
+    return table
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ('rebuild', 'verify'):
+        print("usage: python table_cache.py <rebuild|verify> [path]")
+        return 1
+
+    path = argv[2] if len(argv) > 2 else default_table_path()
+
+    if argv[1] == 'rebuild':
+        print("wrote {0}".format(write_generator_table(path)))
+        return 0
+
+    try:
+        table = load_generator_table(path)
+    except (OSError, ValueError) as error:
+        print("invalid: {0}".format(error))
+        return 1
+
+    print("ok: {0} ({1} entries)".format(path, len(table)))
+    table.close()
+
+    return 0
+
+
+class TestClass:
+    def test_round_trip(self):
+        import tempfile
+        from curve import TEST_CURVE_F211
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_generator_table(os.path.join(directory, 'table.bin'), TEST_CURVE_F211)
+            table = load_generator_table(path, TEST_CURVE_F211)
+            expected = build_generator_table(TEST_CURVE_F211)
+            result = [table[i] for i in range(len(table))]
+            table.close()
+
+        assert expected == result
+        assert None is result[0]
+
+    def test_secp256k1_table_matches_engine(self):
+        import tempfile
+        from secp256k1 import get_generator_table, multiply_generator
+
+        expected = [multiply_generator(k) for k in [7, 2 ** 128, 2 ** 240 + 2 ** 31]]
+        built = get_generator_table()
+
+        with tempfile.TemporaryDirectory() as directory:
+            table = install_generator_table(os.path.join(directory, 'table.bin'))
+
+            try:
+                assert get_generator_table() is table
+                assert built[257] == table[257]
+                assert expected == [multiply_generator(k) for k in [7, 2 ** 128, 2 ** 240 + 2 ** 31]]
+            finally:
+                SECP256K1.generator_table = built
+                table.close()
+
+    def test_checksum_mismatch(self):
+        import tempfile
+        from curve import TEST_CURVE_F211
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_generator_table(os.path.join(directory, 'table.bin'), TEST_CURVE_F211)
+
+            with open(path, 'r+b') as table_file:
+                table_file.seek(HEADER.size + 70)
+                table_file.write(b'\xff')
+
+            try:
+                load_generator_table(path, TEST_CURVE_F211)
+                assert False
+            except ValueError as error:
+                assert 'checksum' in str(error)
+
+    def test_wrong_curve_and_version(self):
+        import tempfile
+        from curve import TEST_CURVE_F211, TEST_CURVE_F223
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_generator_table(os.path.join(directory, 'table.bin'), TEST_CURVE_F211)
+
+            try:
+                load_generator_table(path, TEST_CURVE_F223)
+                assert False
+            except ValueError:
+                pass
+
+            with open(path, 'r+b') as table_file:
+                table_file.seek(8)
+                table_file.write((FORMAT_VERSION + 1).to_bytes(4, 'big'))
+
+            try:
+                load_generator_table(path, TEST_CURVE_F211)
+                assert False
+            except ValueError as error:
+                assert 'version' in str(error)
+
+    def test_ensure_generator_table(self):
+        import tempfile
+        from curve import TEST_CURVE_F211
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = ensure_generator_table(os.path.join(directory, 'table.bin'), TEST_CURVE_F211)
+            modified = os.stat(path).st_mtime_ns
+
+            assert path == ensure_generator_table(path, TEST_CURVE_F211)
+            assert modified == os.stat(path).st_mtime_ns
+            assert None is TEST_CURVE_F211.generator_table or isinstance(TEST_CURVE_F211.generator_table, list)
+
+    def test_install_rebuilds_corrupt_file(self):
+        import tempfile
+        from curve import TEST_CURVE_F211
+        from secp256k1 import multiply_generator
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table.bin')
+            with open(path, 'wb') as table_file:
+                table_file.write(b'garbage')
+
+            table = install_generator_table(path, TEST_CURVE_F211)
+
+            try:
+                assert TEST_CURVE_F211.generator_table is table
+                assert TEST_CURVE_F211.g == multiply_generator(1, TEST_CURVE_F211)
+            finally:
+                TEST_CURVE_F211.generator_table = None
+                table.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
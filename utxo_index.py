@@ -0,0 +1,253 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+# Sorted index over UTXO amounts
+# Amounts are kept in sorted buckets of at most 2 * BUCKET_LOAD entries, with the largest amount of every
+# bucket in a separate list. A bisect over the bucket maxes finds the bucket, a bisect inside it finds the slot,
+# so add/remove cost O(log n) comparisons plus moving at most 2 * BUCKET_LOAD entries.
+
+BUCKET_LOAD = 1000
+
+
+class SortedUTXOIndex:
+    def __init__(self, amounts=()):
+        values = sorted(amounts)
+        self._buckets = [values[i:i + BUCKET_LOAD] for i in range(0, len(values), BUCKET_LOAD)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._length = len(values)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return chain.from_iterable(self._buckets)
+
+    def __reversed__(self):
+        return chain.from_iterable(reversed(bucket) for bucket in reversed(self._buckets))
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self._length
+
+        if not 0 <= position < self._length:
+            raise IndexError("UTXO index position out of range")
+
+        for bucket in self._buckets:
+            if position < len(bucket):
+                return bucket[position]
+
+            position -= len(bucket)
+
+    def __contains__(self, amount):
+        k = bisect_left(self._maxes, amount)
+        if k == len(self._maxes):
+            return False
+
+        bucket = self._buckets[k]
+        i = bisect_left(bucket, amount)
+
+        return i < len(bucket) and bucket[i] == amount
+
+    def add(self, amount):
+        if not self._buckets:
+            self._buckets.append([amount])
+            self._maxes.append(amount)
+            self._length = 1
+            return
+
+        k = bisect_left(self._maxes, amount)
+        if k == len(self._maxes):
+            k -= 1
+
+        bucket = self._buckets[k]
+        insort(bucket, amount)
+        self._maxes[k] = bucket[-1]
+        self._length += 1
+
+        if len(bucket) > 2 * BUCKET_LOAD:
+            self._buckets[k:k + 1] = [bucket[:BUCKET_LOAD], bucket[BUCKET_LOAD:]]
+            self._maxes[k:k + 1] = [bucket[BUCKET_LOAD - 1], bucket[-1]]
+
+    def remove(self, amount):
+        k = bisect_left(self._maxes, amount)
+        if k == len(self._maxes):
+            raise ValueError("UTXO amount not in index: {0}".format(amount))
+
+        bucket = self._buckets[k]
+        i = bisect_left(bucket, amount)
+        if i == len(bucket) or bucket[i] != amount:
+            raise ValueError("UTXO amount not in index: {0}".format(amount))
+
+        del bucket[i]
+        self._length -= 1
+
+        if bucket:
+            self._maxes[k] = bucket[-1]
+        else:
+            del self._buckets[k]
+            del self._maxes[k]
+
+    # Smallest single amount >= target, None if there is none
+    def smallest_at_least(self, target):
+        k = bisect_left(self._maxes, target)
+        if k == len(self._maxes):
+            return None
+
+        bucket = self._buckets[k]
+
+        return bucket[bisect_left(bucket, target)]
+
+    # Number of amounts <= value
+    def rank(self, value):
+        k = bisect_right(self._maxes, value)
+        count = sum(len(bucket) for bucket in self._buckets[:k])
+
+        if k < len(self._buckets):
+            count += bisect_right(self._buckets[k], value)
+
+        return count
+
+    # Number of amounts < value, which is also the position of the first amount >= value
+    def rank_below(self, value):
+        k = bisect_left(self._maxes, value)
+        count = sum(len(bucket) for bucket in self._buckets[:k])
+
+        if k < len(self._buckets):
+            count += bisect_left(self._buckets[k], value)
+
+        return count
+
+    # Amounts from position downwards, largest first
+    def descending_from(self, position):
+        for k, bucket in enumerate(self._buckets):
+            if position < len(bucket):
+                yield from reversed(bucket[:position + 1])
+                for lower_bucket in reversed(self._buckets[:k]):
+                    yield from reversed(lower_bucket)
+                return
+
+            position -= len(bucket)
+
+    # Same two-pointer scan as sort_then_iterate, run directly on the index without sorting or copying.
+    # The high pointer starts at the smallest amount that reaches the target with the smallest amount,
+    # every larger amount could only make a bigger sum.
+    def find_pair(self, target):
+        last_found_inputs = (0, 0)
+
+        if self._length < 2:
+            return last_found_inputs
+
+        current_lowest_output = None
+        low_values = iter(self)
+        low = next(low_values)
+        low_position = 0
+        high_position = max(min(self.rank_below(target - low), self._length - 1), 1)
+        high_values = self.descending_from(high_position)
+        high = next(high_values)
+
+        while low_position != high_position:
+            output_values = low + high
+
+            if target <= output_values and (current_lowest_output is None or output_values < current_lowest_output):
+                current_lowest_output = output_values
+                last_found_inputs = (low, high)
+
+            if output_values == target:
+                break
+
+            if output_values > target:
+                high = next(high_values)
+                high_position -= 1
+            else:
+                low = next(low_values)
+                low_position += 1
+
+        return last_found_inputs
+
+
+class TestClass:
+    def test_index_is_sorted(self):
+        expected = [0.5, 0.9, 2, 3, 5]
+        index = SortedUTXOIndex([2, 0.5, 5, 3, 0.9])
+        result = list(index)
+
+        assert expected == result
+        assert list(reversed(expected)) == list(reversed(index))
+
+    def test_add_and_remove(self):
+        expected = [1, 3, 4]
+        index = SortedUTXOIndex([3, 1, 2])
+        index.add(4)
+        index.remove(2)
+        result = list(index)
+
+        assert expected == result
+        assert len(index) == 3
+        assert 3 in index
+        assert 2 not in index
+
+    def test_getitem(self):
+        index = SortedUTXOIndex(range(2500, 0, -1))
+
+        assert 1 == index[0]
+        assert 1501 == index[1500]
+        assert 2500 == index[-1]
+
+    def test_remove_missing_amount(self):
+        index = SortedUTXOIndex([1, 2])
+
+        try:
+            index.remove(5)
+            assert False
+        except ValueError:
+            pass
+
+    def test_buckets_split_and_merge(self):
+        import random
+        rng = random.Random(4)
+        amounts = [rng.randint(1, 10 ** 6) for _ in range(5 * BUCKET_LOAD)]
+        index = SortedUTXOIndex()
+
+        for amount in amounts:
+            index.add(amount)
+
+        assert list(index) == sorted(amounts)
+        assert len(index._buckets) > 1
+
+        for amount in amounts[::2]:
+            index.remove(amount)
+
+        assert list(index) == sorted(amounts[1::2])
+        assert index.rank(500000) == sum(1 for amount in amounts[1::2] if amount <= 500000)
+
+    def test_smallest_at_least(self):
+        index = SortedUTXOIndex([2, 0.5, 5, 3, 0.9])
+
+        assert 3 == index.smallest_at_least(2.5)
+        assert 0.5 == index.smallest_at_least(0)
+        assert None is index.smallest_at_least(6)
+
+    def test_find_pair(self):
+        index = SortedUTXOIndex([2, 0.5, 5, 3, 0.9, 10, 100, 93, 0.23, 0.005, 0.123, 0.8342, 0.00002, 0.002342, 7, 11])
+
+        assert (0.123, 0.23) == index.find_pair(0.3)
+        assert (0, 0) == index.find_pair(1000)
+        assert (0, 0) == SortedUTXOIndex([0.5]).find_pair(0.71)
+
+    def test_find_pair_matches_sort_then_iterate(self):
+        import random
+        from scholarship_question import sort_then_iterate
+        rng = random.Random(5)
+
+        for _ in range(200):
+            amounts = [rng.randint(1, 500) for _ in range(rng.randint(2, 3000))]
+            target = rng.randint(1, 1200)
+            index = SortedUTXOIndex(amounts)
+
+            assert sort_then_iterate(amounts, target) == index.find_pair(target)
+
+    def test_descending_from(self):
+        index = SortedUTXOIndex(range(2500))
+
+        assert [1500, 1499, 1498] == list(index.descending_from(1500))[:3]
+        assert 1501 == len(list(index.descending_from(1500)))